@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
+from fastapi_cache.decorator import cache
 from typing import Optional
 import logging
 
 from app.core.security import get_current_user
+from app.core.cache import ACTIVITIES_NAMESPACE, user_scoped_key_builder
 from app.services.activity_service import activity_service
 from app.schemas.activity_schemas import (
     ActivityLogCreate,
@@ -18,6 +21,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=APIResponseSchema)
+@cache(expire=30, namespace=ACTIVITIES_NAMESPACE, key_builder=user_scoped_key_builder)
 async def get_user_activities(
     skip: int = Query(0, ge=0, description="Number of activities to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of activities to return"),
@@ -33,14 +37,15 @@ async def get_user_activities(
             activity_type=activity_type
         )
         
-        return APIResponseSchema(
+        # The page is already plain dicts, so orjson encodes the envelope without a pydantic pass
+        return ORJSONResponse(content=dict(APIResponseSchema.model_construct(
             success=True,
-            message=f"Retrieved {len(result.activities)} activities",
-            data=result.dict()
-        )
+            message=f"Retrieved {len(result['activities'])} activities",
+            data=result
+        )))
         
     except Exception as e:
-        logger.error(f"Error getting user activities: {str(e)}")
+        logger.error("Error getting user activities: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving activities: {str(e)}"
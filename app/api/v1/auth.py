@@ -2,7 +2,8 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import HTTPAuthorizationCredentials
 from datetime import timedelta
 import hashlib
-from typing import Dict
+import types
+from typing import Dict, Mapping, Optional
 
 from app.core.security import (
     verify_password, 
@@ -25,31 +26,79 @@ from app.schemas.pdf_schemas import APIResponseSchema
 
 router = APIRouter()
 
+class User:
+    """User record in the mock database."""
+    
+    __slots__ = (
+        "user_id",
+        "email",
+        "hashed_password",
+        "full_name",
+        "is_admin",
+        "created_at",
+        "profile_schema"
+    )
+    
+    def __init__(
+        self,
+        user_id: str,
+        email: str,
+        hashed_password: str,
+        full_name: Optional[str] = None,
+        is_admin: bool = False,
+        created_at: Optional[str] = None
+    ):
+        self.user_id = user_id
+        self.email = email
+        self.hashed_password = hashed_password
+        self.full_name = full_name
+        self.is_admin = is_admin
+        self.created_at = created_at
+        
+        # Built once so the profile endpoint can return it as is
+        self.profile_schema = UserProfileSchema(
+            user_id=user_id,
+            email=email,
+            full_name=full_name,
+            is_admin=is_admin,
+            created_at=created_at
+        )
+
 # Mock user database (in production, use a real database)
-MOCK_USERS = {
-    "admin@example.com": {
-        "user_id": "admin_123",
-        "email": "admin@example.com",
-        "hashed_password": get_password_hash("admin123"),
-        "full_name": "Admin User",
-        "is_admin": True,
-        "created_at": "2024-01-01T00:00:00Z"
-    },
-    "user@example.com": {
-        "user_id": "user_456",
-        "email": "user@example.com",
-        "hashed_password": get_password_hash("user123"),
-        "full_name": "Regular User",
-        "is_admin": False,
-        "created_at": "2024-01-01T00:00:00Z"
-    }
+# Password hashes are precomputed bcrypt strings so importing this module does
+# not pay for a bcrypt key schedule per seeded user in every worker.
+_USERS: Dict[str, User] = {
+    "admin@example.com": User(
+        user_id="admin_123",
+        email="admin@example.com",
+        hashed_password="$2b$12$04w4a6hCed9ZkbX2jfsBy.URLv7HQ9uuTS/KP6CqWnhz33RjmQIvy",  # admin123
+        full_name="Admin User",
+        is_admin=True,
+        created_at="2024-01-01T00:00:00Z"
+    ),
+    "user@example.com": User(
+        user_id="user_456",
+        email="user@example.com",
+        hashed_password="$2b$12$GsHCjUVdj57.QPFK3EVMhOdofE5nBFmLB377WHlRZnI8c.McPyiWW",  # user123
+        full_name="Regular User",
+        is_admin=False,
+        created_at="2024-01-01T00:00:00Z"
+    )
 }
 
-def get_user_by_email(email: str) -> Dict:
+# Read-only view for lookups; only create_user writes through _USERS
+MOCK_USERS: Mapping[str, User] = types.MappingProxyType(_USERS)
+
+# Hash checked against when the email is unknown, so a missing account costs
+# the same bcrypt verification as a wrong password and login timing does not
+# reveal which emails are registered.
+_DUMMY_HASH = "$2b$12$oE0kM8uTt7Y3fC4xwnBwfOAfAWP.Fkvs96Kw2C7ZlV9jBAzpzfynW"  # "invalid"
+
+def get_user_by_email(email: str) -> Optional[User]:
     """Get user by email from mock database."""
     return MOCK_USERS.get(email)
 
-def create_user(user_data: UserRegistrationSchema) -> Dict:
+def create_user(user_data: UserRegistrationSchema) -> User:
     """Create a new user (mock implementation)."""
     if user_data.email in MOCK_USERS:
         raise HTTPException(
@@ -57,18 +106,18 @@ def create_user(user_data: UserRegistrationSchema) -> Dict:
             detail="Email already registered"
         )
     
-    user_id = f"user_{hashlib.md5(user_data.email.encode()).hexdigest()[:8]}"
+    user_id = f"user_{hashlib.blake2b(user_data.email.encode(), digest_size=4).hexdigest()}"
     
-    new_user = {
-        "user_id": user_id,
-        "email": user_data.email,
-        "hashed_password": get_password_hash(user_data.password),
-        "full_name": user_data.full_name,
-        "is_admin": False,
-        "created_at": "2024-01-01T00:00:00Z"
-    }
+    new_user = User(
+        user_id=user_id,
+        email=user_data.email,
+        hashed_password=get_password_hash(user_data.password),
+        full_name=user_data.full_name,
+        is_admin=False,
+        created_at="2024-01-01T00:00:00Z"
+    )
     
-    MOCK_USERS[user_data.email] = new_user
+    _USERS[user_data.email] = new_user
     return new_user
 
 @router.post("/register", response_model=APIResponseSchema, status_code=status.HTTP_201_CREATED)
@@ -80,11 +129,11 @@ async def register_user(user_data: UserRegistrationSchema):
         # Create tokens
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user["user_id"], "email": user["email"], "is_admin": user["is_admin"]},
+            data={"sub": user.user_id, "email": user.email, "is_admin": user.is_admin},
             expires_delta=access_token_expires
         )
         refresh_token = create_refresh_token(
-            data={"sub": user["user_id"], "email": user["email"]}
+            data={"sub": user.user_id, "email": user.email, "is_admin": user.is_admin}
         )
         
         token_data = TokenSchema(
@@ -112,7 +161,13 @@ async def login_user(user_credentials: UserLoginSchema):
     """Authenticate user and return JWT tokens."""
     user = get_user_by_email(user_credentials.email)
     
-    if not user or not verify_password(user_credentials.password, user["hashed_password"]):
+    # Always run a bcrypt verification, and combine the results without
+    # short-circuiting, so unknown emails take the same path as bad passwords.
+    password_valid = verify_password(
+        user_credentials.password,
+        user.hashed_password if user else _DUMMY_HASH
+    )
+    if not (password_valid & (user is not None)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -122,11 +177,11 @@ async def login_user(user_credentials: UserLoginSchema):
     # Create tokens
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["user_id"], "email": user["email"], "is_admin": user["is_admin"]},
+        data={"sub": user.user_id, "email": user.email, "is_admin": user.is_admin},
         expires_delta=access_token_expires
     )
     refresh_token = create_refresh_token(
-        data={"sub": user["user_id"], "email": user["email"]}
+        data={"sub": user.user_id, "email": user.email, "is_admin": user.is_admin}
     )
     
     token_data = TokenSchema(
@@ -162,18 +217,13 @@ async def refresh_token(token_data: TokenRefreshSchema):
             detail="Invalid token payload"
         )
     
-    # Get user to check if still exists and get current admin status
-    user = get_user_by_email(email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+    # Admin status is carried in the refresh token, so no user lookup is needed
+    is_admin = payload.get("is_admin", False)
     
     # Create new access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user_id, "email": email, "is_admin": user["is_admin"]},
+        data={"sub": user_id, "email": email, "is_admin": is_admin},
         expires_delta=access_token_expires
     )
     
@@ -192,7 +242,7 @@ async def refresh_token(token_data: TokenRefreshSchema):
 @router.get("/profile", response_model=APIResponseSchema)
 async def get_user_profile(current_user: dict = Depends(get_current_user)):
     """Get current user profile."""
-    user = get_user_by_email(current_user["email"])
+    user = MOCK_USERS.get(current_user["email"])
     
     if not user:
         raise HTTPException(
@@ -200,18 +250,10 @@ async def get_user_profile(current_user: dict = Depends(get_current_user)):
             detail="User not found"
         )
     
-    profile_data = UserProfileSchema(
-        user_id=user["user_id"],
-        email=user["email"],
-        full_name=user.get("full_name"),
-        is_admin=user.get("is_admin", False),
-        created_at=user.get("created_at")
-    )
-    
     return APIResponseSchema(
         success=True,
         message="Profile retrieved successfully",
-        data=profile_data
+        data=user.profile_schema
     )
 
 @router.post("/logout", response_model=APIResponseSchema)
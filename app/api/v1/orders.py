@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, BackgroundTasks
+from fastapi.responses import ORJSONResponse
+from fastapi_cache.decorator import cache
 from typing import List, Optional
 
 from app.core.security import get_current_user
+from app.core.cache import (
+    ORDERS_NAMESPACE,
+    ACTIVITIES_NAMESPACE,
+    user_scoped_key_builder,
+    invalidate_cache
+)
 from app.schemas.order_schemas import (
     OrderCreate, 
     OrderUpdate, 
     OrderResponse, 
-    OrderListResponse,
+    OrderListDict,
     OrderStatsResponse
 )
 from app.schemas.pdf_schemas import APIResponseSchema
@@ -16,32 +24,59 @@ from app.schemas.activity_schemas import ActivityTypeEnum
 
 router = APIRouter()
 
+# Activity types bound once at import for the mutation handlers
+_ORDER_CREATE = ActivityTypeEnum.ORDER_CREATE
+_ORDER_UPDATE = ActivityTypeEnum.ORDER_UPDATE
+_ORDER_DELETE = ActivityTypeEnum.ORDER_DELETE
+
+async def log_order_activity(
+    user_id: str,
+    activity_type: ActivityTypeEnum,
+    description: str,
+    details: dict
+):
+    """Log an order activity and drop the user's cached activity list.
+
+    Runs as a background task after the response has been sent.
+    """
+    try:
+        activity_service.log_user_activity(
+            user_id=user_id,
+            activity_type=activity_type,
+            description=description,
+            details=details
+        )
+    except Exception as e:
+        # Don't fail the order request if activity logging fails
+        pass
+    await invalidate_cache(ACTIVITIES_NAMESPACE, user_id)
+
 @router.post("", response_model=APIResponseSchema, status_code=status.HTTP_201_CREATED)
 async def create_order(
     order_data: OrderCreate,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new order."""
     try:
         order = order_service.create_order(order_data, current_user["user_id"])
+        await invalidate_cache(ORDERS_NAMESPACE)
         
         # Log order creation activity
-        try:
-            activity_service.log_user_activity(
-                user_id=current_user["user_id"],
-                activity_type=ActivityTypeEnum.ORDER_CREATE,
-                description=f"Created order for patient: {order_data.patient_first_name} {order_data.patient_last_name}",
-                details={
-                    "order_id": order.id,
-                    "patient_name": f"{order_data.patient_first_name} {order_data.patient_last_name}",
-                    "patient_dob": order_data.patient_date_of_birth,
-                    "order_status": order_data.order_status,
-                    "notes": order_data.notes
-                }
-            )
-        except Exception as e:
-            # Don't fail order creation if activity logging fails
-            pass
+        patient_name = f"{order_data.patient_first_name} {order_data.patient_last_name}"
+        background_tasks.add_task(
+            log_order_activity,
+            user_id=current_user["user_id"],
+            activity_type=_ORDER_CREATE,
+            description=f"Created order for patient: {patient_name}",
+            details={
+                "order_id": order.id,
+                "patient_name": patient_name,
+                "patient_dob": order_data.patient_date_of_birth,
+                "order_status": order_data.order_status,
+                "notes": order_data.notes
+            }
+        )
         
         return APIResponseSchema(
             success=True,
@@ -56,6 +91,7 @@ async def create_order(
         )
 
 @router.get("", response_model=APIResponseSchema)
+@cache(expire=30, namespace=ORDERS_NAMESPACE, key_builder=user_scoped_key_builder)
 async def get_orders(
     skip: int = Query(0, ge=0, description="Number of orders to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of orders to return"),
@@ -64,26 +100,50 @@ async def get_orders(
 ):
     """Get orders with pagination and filtering."""
     try:
-        orders = order_service.get_orders(skip=skip, limit=limit, status=status)
-        total_count = order_service.get_orders_count()
-        
-        # Calculate pagination info
-        pages = (total_count + limit - 1) // limit
+        # Fetch one extra order to know whether another page follows
+        orders = order_service.get_orders(skip=skip, limit=limit + 1, status=status)
         current_page = (skip // limit) + 1
         
-        response_data = OrderListResponse(
-            orders=orders,
-            total=total_count,
-            page=current_page,
-            size=limit,
-            pages=pages
-        )
+        if not orders:
+            # Nothing to paginate; a first page that is empty needs no count either
+            return ORJSONResponse(content=dict(APIResponseSchema.model_construct(
+                success=True,
+                message="Retrieved 0 orders",
+                data={
+                    "orders": [],
+                    "total": 0 if skip == 0 else None,
+                    "page": current_page,
+                    "size": limit,
+                    "pages": 0 if skip == 0 else None,
+                    "has_next": False
+                }
+            )))
         
-        return APIResponseSchema(
+        has_next = len(orders) > limit
+        orders = orders[:limit]
+        
+        # Only the first page pays for a full count; later pages rely on has_next
+        total_count = None
+        pages = None
+        if skip == 0:
+            total_count = order_service.get_orders_count(status=status)
+            pages = (total_count + limit - 1) // limit
+        
+        response_data: OrderListDict = {
+            "orders": orders,
+            "total": total_count,
+            "page": current_page,
+            "size": limit,
+            "pages": pages,
+            "has_next": has_next
+        }
+        
+        # The page is already plain dicts, so orjson encodes the envelope without a pydantic pass
+        return ORJSONResponse(content=dict(APIResponseSchema.model_construct(
             success=True,
             message=f"Retrieved {len(orders)} orders",
             data=response_data
-        )
+        )))
         
     except Exception as e:
         raise HTTPException(
@@ -124,53 +184,47 @@ async def get_order(
 async def update_order(
     order_id: int,
     order_data: OrderUpdate,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user)
 ):
     """Update an existing order."""
     try:
-        # Get the original order for comparison
-        original_order = order_service.get_order(order_id)
-        if not original_order:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Order not found"
-            )
+        # The service returns the original order alongside the updated one for comparison
+        result = order_service.update_order(order_id, order_data, current_user["user_id"])
         
-        order = order_service.update_order(order_id, order_data, current_user["user_id"])
-        
-        if not order:
+        if not result:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Order not found"
             )
+        original_order, order = result
+        await invalidate_cache(ORDERS_NAMESPACE)
+        
+        # Determine what fields were changed
+        update_data = {field: getattr(order_data, field) for field in order_data.__pydantic_fields_set__}
+        changes = {
+            field: {
+                "old_value": getattr(original_order, field),
+                "new_value": new_value
+            }
+            for field, new_value in update_data.items()
+            if getattr(original_order, field) != new_value
+        }
         
         # Log order update activity
-        try:
-            # Determine what fields were changed
-            changes = {}
-            update_data = order_data.dict(exclude_unset=True)
-            for field, new_value in update_data.items():
-                original_value = getattr(original_order, field, None)
-                if original_value != new_value:
-                    changes[field] = {
-                        "old_value": original_value,
-                        "new_value": new_value
-                    }
-            
-            activity_service.log_user_activity(
-                user_id=current_user["user_id"],
-                activity_type=ActivityTypeEnum.ORDER_UPDATE,
-                description=f"Updated order #{order_id} for patient: {order.patient_first_name} {order.patient_last_name}",
-                details={
-                    "order_id": order_id,
-                    "patient_name": f"{order.patient_first_name} {order.patient_last_name}",
-                    "changes": changes,
-                    "updated_fields": list(update_data.keys())
-                }
-            )
-        except Exception as e:
-            # Don't fail order update if activity logging fails
-            pass
+        patient_name = f"{order.patient_first_name} {order.patient_last_name}"
+        background_tasks.add_task(
+            log_order_activity,
+            user_id=current_user["user_id"],
+            activity_type=_ORDER_UPDATE,
+            description=f"Updated order #{order_id} for patient: {patient_name}",
+            details={
+                "order_id": order_id,
+                "patient_name": patient_name,
+                "changes": changes,
+                "updated_fields": list(update_data.keys())
+            }
+        )
         
         return APIResponseSchema(
             success=True,
@@ -189,45 +243,38 @@ async def update_order(
 @router.delete("/{order_id}", response_model=APIResponseSchema)
 async def delete_order(
     order_id: int,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user)
 ):
     """Delete an order."""
     try:
-        # Get the order details before deletion for logging
-        order_to_delete = order_service.get_order(order_id)
-        if not order_to_delete:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Order not found"
-            )
-        
-        success = order_service.delete_order(order_id)
+        # The service returns the deleted order's details for logging
+        order_to_delete = order_service.delete_order(order_id)
         
-        if not success:
+        if not order_to_delete:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Order not found"
             )
+        await invalidate_cache(ORDERS_NAMESPACE)
         
         # Log order deletion activity
-        try:
-            activity_service.log_user_activity(
-                user_id=current_user["user_id"],
-                activity_type=ActivityTypeEnum.ORDER_DELETE,
-                description=f"Deleted order #{order_id} for patient: {order_to_delete.patient_first_name} {order_to_delete.patient_last_name}",
-                details={
-                    "order_id": order_id,
-                    "patient_name": f"{order_to_delete.patient_first_name} {order_to_delete.patient_last_name}",
-                    "patient_dob": order_to_delete.patient_date_of_birth,
-                    "order_status": order_to_delete.order_status,
-                    "notes": order_to_delete.notes,
-                    "created_at": order_to_delete.created_at.isoformat(),
-                    "updated_at": order_to_delete.updated_at.isoformat()
-                }
-            )
-        except Exception as e:
-            # Don't fail order deletion if activity logging fails
-            pass
+        patient_name = f"{order_to_delete.patient_first_name} {order_to_delete.patient_last_name}"
+        background_tasks.add_task(
+            log_order_activity,
+            user_id=current_user["user_id"],
+            activity_type=_ORDER_DELETE,
+            description=f"Deleted order #{order_id} for patient: {patient_name}",
+            details={
+                "order_id": order_id,
+                "patient_name": patient_name,
+                "patient_dob": order_to_delete.patient_date_of_birth,
+                "order_status": order_to_delete.order_status,
+                "notes": order_to_delete.notes,
+                "created_at": order_to_delete.created_at.isoformat(),
+                "updated_at": order_to_delete.updated_at.isoformat()
+            }
+        )
         
         return APIResponseSchema(
             success=True,
@@ -1,68 +1,190 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends, Query, Request
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
-import os
-import shutil
 from pathlib import Path
-import tempfile
 import asyncio
+import errno
+import os
+import aiofiles
 
 from app.core.security import get_current_user
-from app.core.config import settings
+from app.core.config import settings, BATCH_SIZE, MAX_FILE_SIZE, INLINE_PDF_THRESHOLD
+from app.core.temp_pool import temp_file_pool
 from app.services.pdf_service import pdf_processor
 from app.schemas.pdf_schemas import (
     APIResponseSchema
 )
-from app.core.exceptions import PDFProcessingError, BatchProcessingError, FileValidationError
-from app.services.activity_service import activity_service
+from app.services.activity_queue import activity_queue, UploadActivity, BatchUploadActivity
 from app.schemas.activity_schemas import ActivityTypeEnum
 
 router = APIRouter()
 
-@router.post("/upload", response_model=APIResponseSchema, status_code=status.HTTP_201_CREATED)
+# Bytes read from an upload per chunk while spooling it to disk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Allowance for multipart boundaries and part headers on top of the file bytes
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Every PDF starts with this magic number
+PDF_MAGIC = b'%PDF-'
+
+# Caps how many uploads are spooled at once so large batches don't exhaust file descriptors
+_spool_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_TASKS)
+
+def _check_content_length(request: Request, max_size: int) -> None:
+    """Reject a request whose declared body is larger than the files it may carry."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size + MULTIPART_OVERHEAD:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds maximum allowed size of {max_size} bytes"
+        )
+
+def _too_large(file: UploadFile) -> HTTPException:
+    """Build the error for an upload larger than MAX_FILE_SIZE."""
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File {file.filename} exceeds maximum allowed size of {MAX_FILE_SIZE} bytes"
+    )
+
+def _is_pdf_filename(filename: str) -> bool:
+    """Check the file extension, case-insensitively, without lowercasing the whole name."""
+    return os.path.splitext(filename)[1].casefold() == '.pdf'
+
+async def _read_pdf_header(file: UploadFile) -> bytes:
+    """Read the upload's first bytes and reject it unless they are the PDF magic number."""
+    header = await file.read(len(PDF_MAGIC))
+    if header != PDF_MAGIC:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File {file.filename} is not a valid PDF document."
+        )
+    return header
+
+def _no_space(file: UploadFile) -> HTTPException:
+    """Build the error for an upload the spool filesystem has no room for."""
+    return HTTPException(
+        status_code=status.HTTP_507_INSUFFICIENT_STORAGE,
+        detail=f"Not enough storage to process file {file.filename}"
+    )
+
+def _preallocate(fd: int, size: int) -> None:
+    """Reserve disk blocks for a spool file up front, where the filesystem supports it.
+    
+    A full filesystem raises ENOSPC here, before any upload bytes are written.
+    """
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except AttributeError:
+        # Not available on this platform; blocks are allocated as written
+        pass
+    except OSError as e:
+        if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+            raise
+        # Not supported by this filesystem; blocks are allocated as written
+
+async def _write_spool(temp_file_path: Path, file: UploadFile, header: bytes) -> None:
+    """Write header and the rest of the upload to a spool file, enforcing MAX_FILE_SIZE."""
+    async with aiofiles.open(temp_file_path, 'wb') as temp_file:
+        _preallocate(temp_file.fileno(), min(file.size or MAX_FILE_SIZE, MAX_FILE_SIZE))
+        await temp_file.write(header)
+        # Count bytes as they stream; the declared size can't be trusted
+        written = len(header)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > MAX_FILE_SIZE:
+                raise _too_large(file)
+            await temp_file.write(chunk)
+        # Drop the unused tail of the preallocated region
+        await temp_file.truncate()
+
+async def _spool(file: UploadFile, header: bytes = b'') -> Path:
+    """Stream an uploaded file to a pooled temporary file without blocking the event loop.
+    
+    ``header`` holds bytes already read from the start of the upload; they are written first.
+    If the spool filesystem (e.g. a small tmpfs) is full, the upload is spooled to disk instead.
+    """
+    # The multipart parser already knows the part's size; reject it before allocating anything
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise _too_large(file)
+    
+    async with _spool_semaphore:
+        temp_file_path = temp_file_pool.acquire()
+        try:
+            try:
+                await _write_spool(temp_file_path, file, header)
+            except OSError as e:
+                if e.errno != errno.ENOSPC:
+                    raise
+                fallback_path = temp_file_pool.acquire_fallback()
+                if fallback_path is None:
+                    raise
+                temp_file_pool.release(temp_file_path)
+                temp_file_path = fallback_path
+                await file.seek(len(header))
+                await _write_spool(temp_file_path, file, header)
+        except OSError as e:
+            temp_file_pool.release(temp_file_path)
+            if e.errno == errno.ENOSPC:
+                raise _no_space(file) from e
+            raise
+        except BaseException:
+            temp_file_pool.release(temp_file_path)
+            raise
+    return temp_file_path
+
+@router.post(
+    "/upload",
+    response_model=APIResponseSchema,
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_201_CREATED
+)
 async def upload_and_process_pdf(
+    request: Request,
     file: UploadFile = File(..., description="PDF file to process"),
     current_user: dict = Depends(get_current_user)
 ):
     """Upload and process a single PDF file."""
     
+    _check_content_length(request, MAX_FILE_SIZE)
+    
     # Validate file type
-    if not file.filename.lower().endswith('.pdf'):
+    if not _is_pdf_filename(file.filename):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only PDF files are allowed"
         )
+    header = await _read_pdf_header(file)
     
-    # Create temporary file
-    temp_file = None
+    pdf_pool = getattr(request.app.state, "pdf_pool", None)
+    temp_file_path = None
     try:
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            shutil.copyfileobj(file.file, temp_file)
-            temp_file_path = Path(temp_file.name)
-        
-        # Process the PDF (clinical data only)
-        result = await pdf_processor.process_single_pdf_clinical_only(temp_file_path)
+        # Process the PDF (clinical data only); small uploads skip the temporary file
+        if file.size is not None and file.size < INLINE_PDF_THRESHOLD:
+            result = await pdf_processor.process_single_pdf_clinical_only_bytes(
+                header + await file.read(), file.filename, pdf_pool
+            )
+        else:
+            temp_file_path = await _spool(file, header)
+            result = await pdf_processor.process_single_pdf_clinical_only(temp_file_path, pdf_pool)
+        # Report the client's filename rather than the spool file's, whichever path ran
+        result["filename"] = file.filename
         
         # Add user context to result
         result["processed_by"] = current_user["user_id"]
         
         # Log PDF upload activity
-        try:
-            activity_service.log_user_activity(
-                user_id=current_user["user_id"],
-                activity_type=ActivityTypeEnum.PDF_UPLOAD,
-                description=f"Uploaded PDF: {file.filename}",
-                details={
-                    "filename": file.filename,
-                    "file_size": result.get("file_size", 0),
-                    "total_pages": result.get("total_pages", 0),
-                    "extraction_method": result.get("extraction_method", "unknown")
-                }
+        activity_queue.put_nowait(
+            user_id=current_user["user_id"],
+            activity_type=ActivityTypeEnum.PDF_UPLOAD,
+            description=f"Uploaded PDF: {file.filename}",
+            details=UploadActivity(
+                filename=file.filename,
+                file_size=result.get("file_size", 0),
+                total_pages=result.get("total_pages", 0),
+                extraction_method=result.get("extraction_method", "unknown")
             )
-        except Exception as e:
-            # Don't fail upload if activity logging fails
-            pass
+        )
         
         return APIResponseSchema(
             success=True,
@@ -70,82 +192,71 @@ async def upload_and_process_pdf(
             data=result
         )
         
-    except FileValidationError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File validation error: {e.message}"
-        )
-    except PDFProcessingError as e:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"PDF processing error: {e.message}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Unexpected error: {str(e)}"
-        )
     finally:
-        # Clean up temporary file
-        if temp_file and Path(temp_file.name).exists():
-            os.unlink(temp_file.name)
+        # Return temporary file to the pool
+        if temp_file_path:
+            temp_file_pool.release(temp_file_path)
 
-@router.post("/batch-upload", response_model=APIResponseSchema, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/batch-upload",
+    response_model=APIResponseSchema,
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_201_CREATED
+)
 async def batch_upload_and_process_pdfs(
+    request: Request,
     files: List[UploadFile] = File(..., description="List of PDF files to process"),
     current_user: dict = Depends(get_current_user)
 ):
     """Upload and process multiple PDF files in batch."""
     
-    if len(files) > settings.BATCH_SIZE:
+    _check_content_length(request, BATCH_SIZE * MAX_FILE_SIZE)
+    
+    if len(files) > BATCH_SIZE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Batch size exceeds maximum allowed size of {settings.BATCH_SIZE}"
+            detail=f"Batch size exceeds maximum allowed size of {BATCH_SIZE}"
         )
     
     # Validate all files are PDFs
     for file in files:
-        if not file.filename.lower().endswith('.pdf'):
+        if not _is_pdf_filename(file.filename):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"File {file.filename} is not a PDF. Only PDF files are allowed."
             )
+    headers = [await _read_pdf_header(file) for file in files]
     
-    temp_files = []
+    temp_file_paths = []
     try:
-        # Create temporary files
-        temp_file_paths = []
-        for file in files:
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-            shutil.copyfileobj(file.file, temp_file)
-            temp_file.close()
-            temp_file_path = Path(temp_file.name)
-            temp_file_paths.append(temp_file_path)
-            temp_files.append(temp_file.name)
+        # Create temporary files concurrently, keeping every spooled path for cleanup
+        spooled = await asyncio.gather(*(_spool(file, header) for file, header in zip(files, headers)), return_exceptions=True)
+        temp_file_paths = [result for result in spooled if isinstance(result, Path)]
+        for result in spooled:
+            if isinstance(result, BaseException):
+                raise result
         
         # Process the batch (clinical data only)
-        result = await pdf_processor.process_batch_pdfs_clinical_only(temp_file_paths)
+        result = await pdf_processor.process_batch_pdfs_clinical_only(
+            temp_file_paths, getattr(request.app.state, "pdf_pool", None)
+        )
         
         # Add user context to result
         result["processed_by"] = current_user["user_id"]
         
         # Log batch PDF upload activity
-        try:
-            activity_service.log_user_activity(
-                user_id=current_user["user_id"],
-                activity_type=ActivityTypeEnum.PDF_BATCH_UPLOAD,
-                description=f"Batch uploaded {len(files)} PDF files",
-                details={
-                    "file_count": len(files),
-                    "filenames": [file.filename for file in files],
-                    "success_count": result['summary']['success_count'],
-                    "error_count": result['summary']['error_count'],
-                    "clinical_data_extracted": result['summary']['clinical_data_extracted']
-                }
+        activity_queue.put_nowait(
+            user_id=current_user["user_id"],
+            activity_type=ActivityTypeEnum.PDF_BATCH_UPLOAD,
+            description=f"Batch uploaded {len(files)} PDF files",
+            details=BatchUploadActivity(
+                file_count=len(files),
+                filenames=[file.filename for file in files],
+                success_count=result['summary']['success_count'],
+                error_count=result['summary']['error_count'],
+                clinical_data_extracted=result['summary']['clinical_data_extracted']
             )
-        except Exception as e:
-            # Don't fail upload if activity logging fails
-            pass
+        )
         
         return APIResponseSchema(
             success=True,
@@ -153,21 +264,10 @@ async def batch_upload_and_process_pdfs(
             data=result
         )
         
-    except BatchProcessingError as e:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"Batch processing error: {e.message}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Unexpected error: {str(e)}"
-        )
     finally:
-        # Clean up temporary files
-        for temp_file_name in temp_files:
-            if os.path.exists(temp_file_name):
-                os.unlink(temp_file_name)
+        # Return temporary files to the pool
+        for temp_file_path in temp_file_paths:
+            temp_file_pool.release(temp_file_path)
 
 
     """Search for text within PDF processing results."""
@@ -0,0 +1,54 @@
+from typing import Callable, Optional
+import hashlib
+import logging
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cache namespaces for list endpoints
+ORDERS_NAMESPACE = "orders"
+ACTIVITIES_NAMESPACE = "activities"
+
+def init_cache() -> None:
+    """Initialize the Redis-backed response cache."""
+    redis = aioredis.from_url(settings.REDIS_URL)
+    FastAPICache.init(RedisBackend(redis), prefix="api-cache")
+
+def user_scoped_key_builder(
+    func: Callable,
+    namespace: Optional[str] = "",
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: Optional[tuple] = None,
+    kwargs: Optional[dict] = None,
+) -> str:
+    """Build a cache key scoped to the authenticated user.
+
+    Query parameters are hashed so filter values never appear in Redis key names.
+    """
+    params = dict(kwargs or {})
+    current_user = params.pop("current_user", None) or {}
+    user_id = current_user.get("user_id", "anonymous")
+
+    params_hash = hashlib.sha256(
+        f"{func.__module__}:{func.__name__}:{sorted(params.items())}".encode()
+    ).hexdigest()
+    return f"{FastAPICache.get_prefix()}:{namespace}:{user_id}:{params_hash}"
+
+async def invalidate_cache(namespace: str, user_id: Optional[str] = None) -> None:
+    """Drop cached responses in a namespace, optionally only for one user."""
+    if user_id:
+        namespace = f"{namespace}:{user_id}"
+
+    try:
+        await FastAPICache.clear(namespace=namespace)
+    except Exception as e:
+        # A stale entry expires on its own; never fail the request over it
+        logger.warning("Failed to invalidate cache namespace %s: %s", namespace, e)
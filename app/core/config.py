@@ -1,6 +1,8 @@
-from pydantic import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List, Optional
+import os
 import secrets
+import tempfile
 
 class Settings(BaseSettings):
     # Project settings
@@ -36,8 +38,17 @@ class Settings(BaseSettings):
     
     # File storage
     UPLOAD_DIR: str = "uploads"
+    # Short-lived upload spool files; point at a tmpfs (e.g. /dev/shm/pdf_spool) to keep them in RAM
+    TEMP_UPLOAD_DIR: str = os.path.join(tempfile.gettempdir(), "pdf_spool")
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    # Uploads smaller than this are processed from memory without a spool file
+    INLINE_PDF_THRESHOLD: int = 2 * 1024 * 1024  # 2MB
     ALLOWED_FILE_TYPES: List[str] = [".pdf"]
+    # Dedup fingerprint for uploads: "xxh3_128", or any hashlib algorithm (e.g. "sha256")
+    HASH_ALGO: str = "xxh3_128"
+    # Full pdfplumber layout analysis (tables, page boxes); off extracts text only with
+    # pdfium, which is several times faster but leaves every page's tables empty
+    EXTRACT_TABLES: bool = True
     
     # Batch processing
     BATCH_SIZE: int = 10
@@ -55,8 +66,13 @@ class Settings(BaseSettings):
     LLAMAPARSE_RESULT_TYPE: str = "text"  # text | markdown | json
     USE_LLAMAPARSE: bool = True
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True)
 
 settings = Settings()
+
+# Hot-path settings bound once at import; settings is frozen, so these can't drift
+BATCH_SIZE = settings.BATCH_SIZE
+MAX_FILE_SIZE = settings.MAX_FILE_SIZE
+INLINE_PDF_THRESHOLD = settings.INLINE_PDF_THRESHOLD
+ALLOWED_FILE_TYPES = frozenset(settings.ALLOWED_FILE_TYPES)
+EXTRACT_TABLES = settings.EXTRACT_TABLES
@@ -1,6 +1,9 @@
 from datetime import datetime, timedelta
 from typing import Optional, Union
-from jose import JWTError, jwt
+import threading
+import time
+from cachetools import TTLCache
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -13,6 +16,16 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT Security
 security = HTTPBearer()
 
+# Signing key constructed once instead of on every encode/decode call
+_jwt_key = jwk.construct(settings.SECRET_KEY, settings.ALGORITHM)
+_jwt_algorithms = [settings.ALGORITHM]
+
+# Decoded payloads of recently verified tokens, keyed by the raw token string,
+# so repeated requests with the same bearer token skip signature verification.
+# Each entry is also checked against the token's own "exp" before reuse.
+_token_cache: TTLCache = TTLCache(maxsize=4096, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_token_cache_lock = threading.Lock()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -30,7 +43,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _jwt_key, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 def create_refresh_token(data: dict) -> str:
@@ -38,16 +51,30 @@ def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _jwt_key, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[dict]:
     """Verify and decode a JWT token."""
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+    if cached is not None:
+        payload, expires_at = cached
+        if time.time() < expires_at:
+            return payload
+        with _token_cache_lock:
+            _token_cache.pop(token, None)
+    
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        payload = jwt.decode(token, _jwt_key, algorithms=_jwt_algorithms)
     except JWTError:
         return None
+    
+    expires_at = payload.get("exp")
+    if expires_at is not None:
+        with _token_cache_lock:
+            _token_cache[token] = (payload, expires_at)
+    return payload
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Get current user from JWT token."""
@@ -0,0 +1,82 @@
+from pathlib import Path
+from typing import Optional, Set
+import asyncio
+import logging
+import os
+import tempfile
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class TempFilePool:
+    """Bounded pool of pre-created spool files that are reused across uploads."""
+
+    def __init__(self, size: int, dir: Optional[str] = None):
+        self.size = size
+        self.dir = dir
+        self._queue: "asyncio.Queue[Path]" = asyncio.Queue(maxsize=size)
+        self._pooled: Set[Path] = set()
+        # Disk directory to spool to when the pool's filesystem is full; set by start()
+        self.fallback_dir: Optional[str] = None
+
+    def _create(self) -> Path:
+        fd, temp_file_name = tempfile.mkstemp(suffix='.pdf', dir=self.dir)
+        os.close(fd)
+        return Path(temp_file_name)
+
+    def start(self) -> None:
+        """Create the spool directory and pre-create the pooled files."""
+        if self.dir:
+            os.makedirs(self.dir, exist_ok=True)
+            # Falling back only helps if the spool is on another filesystem, e.g. a tmpfs
+            if os.stat(self.dir).st_dev != os.stat(tempfile.gettempdir()).st_dev:
+                self.fallback_dir = tempfile.gettempdir()
+        while len(self._pooled) < self.size:
+            path = self._create()
+            self._pooled.add(path)
+            self._queue.put_nowait(path)
+
+    def acquire(self) -> Path:
+        """Take a free spool file, creating a one-off file if the pool is exhausted."""
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return self._create()
+
+    def acquire_fallback(self) -> Optional[Path]:
+        """Create a one-off spool file on disk, or return None if there is no other filesystem to use."""
+        if self.fallback_dir is None:
+            return None
+        fd, temp_file_name = tempfile.mkstemp(suffix='.pdf', dir=self.fallback_dir)
+        os.close(fd)
+        return Path(temp_file_name)
+
+    def release(self, path: Path) -> None:
+        """Return a spool file to the pool, or remove it if it was a one-off."""
+        if path not in self._pooled:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            return
+
+        try:
+            os.truncate(path, 0)
+        except FileNotFoundError:
+            self._pooled.discard(path)
+            return
+        self._queue.put_nowait(path)
+
+    def close(self) -> None:
+        """Remove every pooled file."""
+        for path in self._pooled:
+            try:
+                os.unlink(path)
+            except OSError as e:
+                logger.warning("Failed to remove pooled temp file %s: %s", path, e)
+        self._pooled.clear()
+        self._queue = asyncio.Queue(maxsize=self.size)
+
+# Global pool instance
+temp_file_pool = TempFilePool(size=settings.BATCH_SIZE * 2, dir=settings.TEMP_UPLOAD_DIR)
@@ -2,12 +2,37 @@ from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import uvicorn
 
 from app.core.config import settings
 from app.api.v1.router import api_router
 from app.core.security import get_current_user
 from app.core.exceptions import setup_exception_handlers
+from app.core.cache import init_cache
+from app.core.temp_pool import temp_file_pool
+from app.services.activity_queue import activity_queue
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown."""
+    init_cache()
+    temp_file_pool.start()
+    activity_queue.start()
+    # PDF parsing is CPU-bound, so it runs in worker processes rather than threads.
+    # forkserver starts workers from a clean process instead of forking the event loop,
+    # the Redis connections and the running threads.
+    app.state.pdf_pool = ProcessPoolExecutor(
+        max_workers=settings.MAX_CONCURRENT_TASKS,
+        mp_context=multiprocessing.get_context("forkserver")
+    )
+    yield
+    app.state.pdf_pool.shutdown()
+    await activity_queue.stop()
+    temp_file_pool.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -16,7 +41,9 @@ app = FastAPI(
     version="1.0.0",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Security
@@ -1,103 +1,109 @@
 from fastapi import Request, HTTPException, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+from redis import asyncio as aioredis
+import logging
 import time
-from collections import defaultdict, deque
-from typing import Dict, Deque
-import asyncio
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Endpoints exempt from rate limiting
+_SKIP_PATHS = frozenset({"/health", "/docs", "/redoc", "/openapi.json"})
+
+# Atomically refill and spend from a client's token bucket.
+# Returns {allowed, tokens}; tokens is a string because Redis truncates Lua numbers to integers.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'last_refill')
+local tokens = tonumber(bucket[1]) or capacity
+local last_refill = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - last_refill) * capacity / period)
+
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'last_refill', tostring(now))
+-- An idle bucket is full again after one period, so the key can simply expire
+redis.call('EXPIRE', KEYS[1], math.ceil(period))
+return {allowed, tostring(tokens)}
+"""
+
 class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware using sliding window algorithm."""
+    """Rate limiting middleware using a Redis-backed token bucket per client."""
     
-    def __init__(self, app, calls: int = None, period: int = None):
+    def __init__(self, app, calls: int = None, period: int = None, redis: aioredis.Redis = None):
         super().__init__(app)
         self.calls = calls or settings.RATE_LIMIT_REQUESTS
         self.period = period or settings.RATE_LIMIT_WINDOW
-        self.clients: Dict[str, Deque[float]] = defaultdict(deque)
-        
-    def get_client_id(self, request: Request) -> str:
-        """Get client identifier (IP address)."""
-        # In production, consider using X-Forwarded-For header if behind proxy
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-        return request.client.host if request.client else "unknown"
+        # Shared by every worker, so the limit holds across processes
+        self.redis = redis or aioredis.from_url(settings.REDIS_URL)
+        self.token_bucket = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
     
     async def dispatch(self, request: Request, call_next):
         """Process request with rate limiting."""
         
         # Skip rate limiting for certain endpoints
-        if request.url.path in ["/health", "/docs", "/redoc", "/openapi.json"]:
+        if request.scope["path"] in _SKIP_PATHS:
             return await call_next(request)
         
-        client_id = self.get_client_id(request)
+        calls = self.calls
+        period = self.period
+        
+        # Client identifier (IP address), preferring the first X-Forwarded-For hop behind a proxy
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            client_id = forwarded_for.split(",")[0].strip()
+        else:
+            client = request.scope.get("client")
+            client_id = client[0] if client else "unknown"
         now = time.time()
         
-        # Clean old requests outside the time window
-        client_requests = self.clients[client_id]
-        while client_requests and client_requests[0] <= now - self.period:
-            client_requests.popleft()
+        try:
+            allowed, tokens = await self.token_bucket(
+                keys=[f"rl:{client_id}"], args=[calls, period, now]
+            )
+        except Exception as e:
+            # Fail open; an unavailable limiter must not take the API down with it
+            logger.warning(f"Rate limiter unavailable, allowing request: {str(e)}")
+            return await call_next(request)
+        tokens = float(tokens)
         
         # Check if rate limit is exceeded
-        if len(client_requests) >= self.calls:
+        if not allowed:
+            retry_after = int((1 - tokens) * period / calls) + 1
             return JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
                     "error": "Rate Limit Exceeded",
-                    "message": f"Too many requests. Limit: {self.calls} requests per {self.period} seconds",
-                    "retry_after": int(self.period - (now - client_requests[0])) + 1,
+                    "message": f"Too many requests. Limit: {calls} requests per {period} seconds",
+                    "retry_after": retry_after,
                     "type": "rate_limit_error"
                 },
                 headers={
-                    "X-RateLimit-Limit": str(self.calls),
+                    "X-RateLimit-Limit": str(calls),
                     "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(int(client_requests[0] + self.period)),
-                    "Retry-After": str(int(self.period - (now - client_requests[0])) + 1)
+                    "X-RateLimit-Reset": str(int(now) + retry_after),
+                    "Retry-After": str(retry_after)
                 }
             )
         
-        # Add current request timestamp
-        client_requests.append(now)
-        
         # Process request
         response = await call_next(request)
         
         # Add rate limit headers to response
-        remaining = max(0, self.calls - len(client_requests))
-        response.headers["X-RateLimit-Limit"] = str(self.calls)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        if client_requests:
-            response.headers["X-RateLimit-Reset"] = str(int(client_requests[0] + self.period))
+        headers = response.headers
+        headers["X-RateLimit-Limit"] = str(calls)
+        headers["X-RateLimit-Remaining"] = str(int(tokens))
+        # Time at which the bucket is full again
+        headers["X-RateLimit-Reset"] = str(int(now + (calls - tokens) * period / calls))
         
         return response
-
-# Cleanup task to prevent memory leaks
-class RateLimitCleanup:
-    """Background task to clean up old rate limit data."""
-    
-    def __init__(self, middleware: RateLimitMiddleware):
-        self.middleware = middleware
-        self.cleanup_interval = 300  # 5 minutes
-        
-    async def cleanup_loop(self):
-        """Periodically clean up old client data."""
-        while True:
-            await asyncio.sleep(self.cleanup_interval)
-            now = time.time()
-            
-            # Remove clients with no recent requests
-            clients_to_remove = []
-            for client_id, requests in self.middleware.clients.items():
-                # Remove old requests
-                while requests and requests[0] <= now - self.middleware.period:
-                    requests.popleft()
-                
-                # If no recent requests, mark for removal
-                if not requests:
-                    clients_to_remove.append(client_id)
-            
-            # Remove inactive clients
-            for client_id in clients_to_remove:
-                del self.middleware.clients[client_id]
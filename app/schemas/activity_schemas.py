@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional, Dict, Any, TypedDict
 from datetime import datetime
 from enum import Enum
 
@@ -34,12 +34,10 @@ class ActivityLogInDB(ActivityLogBase):
     user_id: str = Field(..., description="User ID who performed the activity")
     created_at: datetime = Field(..., description="When the activity occurred")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
-class ActivityLogResponse(ActivityLogInDB):
-    """Schema for activity log response."""
-    pass
+# Stored activities are frozen and already carry every response field, so they are returned as-is
+ActivityLogResponse = ActivityLogInDB
 
 class ActivityLogListResponse(BaseModel):
     """Schema for activity log list response."""
@@ -49,6 +47,25 @@ class ActivityLogListResponse(BaseModel):
     size: int = Field(..., description="Page size")
     has_next: bool = Field(..., description="Whether there are more pages")
 
+class ActivityLogDict(TypedDict):
+    """Plain-dict activity log returned by list queries."""
+    activity_type: ActivityTypeEnum
+    description: str
+    details: Optional[Dict[str, Any]]
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+    id: int
+    user_id: str
+    created_at: datetime
+
+class ActivityLogListDict(TypedDict):
+    """Plain-dict activity log list, shaped like ActivityLogListResponse."""
+    activities: List[ActivityLogDict]
+    total: int
+    page: int
+    size: int
+    has_next: bool
+
 class ActivityStatsResponse(BaseModel):
     """Schema for activity statistics response."""
     total_activities: int = Field(..., description="Total number of activities")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, EmailStr, validator
+from pydantic import BaseModel, Field, EmailStr, field_validator
 from typing import Optional
 
 class UserLoginSchema(BaseModel):
@@ -12,7 +12,8 @@ class UserRegistrationSchema(BaseModel):
     password: str = Field(..., min_length=6, description="User password")
     full_name: Optional[str] = Field(None, max_length=100, description="User full name")
     
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password(cls, v):
         if len(v) < 6:
             raise ValueError('Password must be at least 6 characters long')
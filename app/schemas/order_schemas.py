@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, TypedDict
 from datetime import datetime
 
 class OrderBase(BaseModel):
@@ -25,15 +25,35 @@ class OrderResponse(OrderBase):
     updated_at: datetime
     created_by: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 class OrderListResponse(BaseModel):
     orders: List[OrderResponse]
-    total: int
+    total: Optional[int] = None  # Only counted for the first page
     page: int
     size: int
-    pages: int
+    pages: Optional[int] = None
+    has_next: bool
+
+# Plain-dict shapes returned by list queries
+class OrderDict(TypedDict):
+    patient_first_name: str
+    patient_last_name: str
+    patient_date_of_birth: str
+    order_status: str
+    notes: Optional[str]
+    id: int
+    created_at: datetime
+    updated_at: datetime
+    created_by: Optional[str]
+
+class OrderListDict(TypedDict):
+    orders: List[OrderDict]
+    total: Optional[int]
+    page: int
+    size: int
+    pages: Optional[int]
+    has_next: bool
 
 class OrderStatsResponse(BaseModel):
     total_orders: int
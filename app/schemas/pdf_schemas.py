@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
@@ -79,7 +79,8 @@ class TextSearchRequestSchema(BaseModel):
     """Schema for text search request."""
     query: str = Field(..., min_length=1, max_length=500, description="Search query")
     
-    @validator('query')
+    @field_validator('query')
+    @classmethod
     def validate_query(cls, v):
         if not v.strip():
             raise ValueError('Query cannot be empty or whitespace only')
@@ -87,9 +88,10 @@ class TextSearchRequestSchema(BaseModel):
 
 class BatchUploadRequestSchema(BaseModel):
     """Schema for batch upload request."""
-    files: List[str] = Field(..., min_items=1, max_items=10, description="List of file paths or names")
+    files: List[str] = Field(..., min_length=1, max_length=10, description="List of file paths or names")
     
-    @validator('files')
+    @field_validator('files')
+    @classmethod
     def validate_files(cls, v):
         if not v:
             raise ValueError('At least one file must be provided')
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any, Dict, List, Optional
+
+from app.core.cache import ACTIVITIES_NAMESPACE, invalidate_cache
+from app.services.activity_service import activity_service
+
+logger = logging.getLogger(__name__)
+
+@dataclass(slots=True)
+class UploadActivity:
+    """Details of a single PDF upload, turned into a dict only when written."""
+    filename: str
+    file_size: int
+    total_pages: int
+    extraction_method: str
+
+@dataclass(slots=True)
+class BatchUploadActivity:
+    """Details of a batch PDF upload, turned into a dict only when written."""
+    file_count: int
+    filenames: List[str]
+    success_count: int
+    error_count: int
+    clinical_data_extracted: int
+
+class ActivityQueue:
+    """Bounded queue that writes activity logs off the request path in batches."""
+    
+    def __init__(self, maxsize: int = 10000, batch_size: int = 64):
+        self.batch_size = batch_size
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=maxsize)
+        self._worker: Optional[asyncio.Task] = None
+    
+    def put_nowait(self, **event: Any) -> None:
+        """Enqueue an activity without blocking; drops the oldest entry when full."""
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._queue.get_nowait()
+            self._queue.put_nowait(event)
+            logger.warning("Activity queue full, dropped the oldest activity")
+    
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        for event in batch:
+            if is_dataclass(event["details"]):
+                event["details"] = asdict(event["details"])
+        
+        try:
+            activity_service.log_user_activity_bulk(batch)
+        except Exception as e:
+            # Activity logging never fails the work it describes
+            logger.error(f"Error logging activity batch: {str(e)}")
+            return
+        
+        for user_id in {event["user_id"] for event in batch}:
+            await invalidate_cache(ACTIVITIES_NAMESPACE, user_id)
+    
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._flush(batch)
+    
+    def start(self) -> None:
+        """Start the background worker."""
+        self._worker = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the background worker and write out anything still queued."""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if batch:
+            await self._flush(batch)
+
+# Global activity queue instance
+activity_queue = ActivityQueue()
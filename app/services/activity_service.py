@@ -1,19 +1,51 @@
 import logging
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime, time, timedelta
+from bisect import bisect_left
+from collections import Counter, defaultdict
 
 from app.schemas.activity_schemas import (
     ActivityLogCreate, 
     ActivityLogInDB, 
     ActivityLogResponse,
-    ActivityLogListResponse,
+    ActivityLogListDict,
     ActivityStatsResponse,
     ActivityTypeEnum
 )
 
 logger = logging.getLogger(__name__)
 
+def _week_start(activities: List[ActivityLogInDB]) -> int:
+    """Index of the first activity from the last 7 days; activities are stored oldest first."""
+    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+    return bisect_left(activities, seven_days_ago, key=lambda x: x.created_at)
+
+def _count_by_day(activities: List[ActivityLogInDB], start: int) -> Dict[str, int]:
+    """Count activities per day from index start onwards by bisecting at each midnight."""
+    counts = {}
+    if start < len(activities):
+        day = activities[start].created_at.date()
+        while start < len(activities):
+            next_midnight = datetime.combine(day + timedelta(days=1), time.min)
+            end = bisect_left(activities, next_midnight, lo=start, key=lambda x: x.created_at)
+            if end > start:
+                counts[day.isoformat()] = end - start
+            start = end
+            day += timedelta(days=1)
+    return counts
+
+def _paginate(activities: List[ActivityLogInDB], skip: int, limit: int) -> ActivityLogListDict:
+    """Page newest first through activities stored oldest first, as plain dicts."""
+    total = len(activities)
+    page = activities[max(0, total - skip - limit):max(0, total - skip)]
+    return {
+        "activities": [activity.__dict__.copy() for activity in reversed(page)],
+        "total": total,
+        "page": skip // limit + 1 if limit > 0 else 1,
+        "size": limit,
+        "has_next": skip + limit < total
+    }
+
 class ActivityService:
     """Service for managing activity logs."""
     
@@ -22,40 +54,38 @@ class ActivityService:
         # In production, this would be a database
         self._activities: List[ActivityLogInDB] = []
         self._next_id = 1
+        
+        # Indexes kept in insertion (created_at) order alongside _activities
+        self._by_user: Dict[str, List[ActivityLogInDB]] = defaultdict(list)
+        self._by_type: Dict[ActivityTypeEnum, List[ActivityLogInDB]] = defaultdict(list)
+        self._user_counts: Counter = Counter()
+    
+    def _store(self, activity: ActivityLogInDB) -> None:
+        """Append an activity to the log and its indexes."""
+        self._activities.append(activity)
+        self._by_user[activity.user_id].append(activity)
+        self._by_type[activity.activity_type].append(activity)
+        self._user_counts[activity.user_id] += 1
     
     def create_activity(self, activity_data: ActivityLogCreate, user_id: str) -> ActivityLogResponse:
         """Create a new activity log."""
-        try:
-            activity = ActivityLogInDB(
-                id=self._next_id,
-                user_id=user_id,
-                activity_type=activity_data.activity_type,
-                description=activity_data.description,
-                details=activity_data.details,
-                ip_address=activity_data.ip_address,
-                user_agent=activity_data.user_agent,
-                created_at=datetime.utcnow()
-            )
-            
-            self._activities.append(activity)
-            self._next_id += 1
-            
-            logger.info(f"Activity logged: {activity.activity_type} by user {user_id}")
-            
-            return ActivityLogResponse(
-                id=activity.id,
-                user_id=activity.user_id,
-                activity_type=activity.activity_type,
-                description=activity.description,
-                details=activity.details,
-                ip_address=activity.ip_address,
-                user_agent=activity.user_agent,
-                created_at=activity.created_at
-            )
-            
-        except Exception as e:
-            logger.error(f"Error creating activity log: {str(e)}")
-            raise
+        activity = ActivityLogInDB(
+            id=self._next_id,
+            user_id=user_id,
+            activity_type=activity_data.activity_type,
+            description=activity_data.description,
+            details=activity_data.details,
+            ip_address=activity_data.ip_address,
+            user_agent=activity_data.user_agent,
+            created_at=datetime.utcnow()
+        )
+        
+        self._store(activity)
+        self._next_id += 1
+        
+        logger.info(f"Activity logged: {activity.activity_type} by user {user_id}")
+        
+        return activity
     
     def get_user_activities(
         self, 
@@ -63,172 +93,61 @@ class ActivityService:
         skip: int = 0, 
         limit: int = 100,
         activity_type: Optional[ActivityTypeEnum] = None
-    ) -> ActivityLogListResponse:
+    ) -> ActivityLogListDict:
         """Get activities for a specific user."""
-        try:
-            # Filter activities by user
+        # Filter activities by user
+        user_activities = self._by_user.get(user_id, [])
+        
+        # Filter by activity type if specified
+        if activity_type:
+            # Enum members are singletons, so an identity check is enough
+            activity_type = ActivityTypeEnum(activity_type)
             user_activities = [
-                activity for activity in self._activities 
-                if activity.user_id == user_id
+                activity for activity in user_activities 
+                if activity.activity_type is activity_type
             ]
-            
-            # Filter by activity type if specified
-            if activity_type:
-                user_activities = [
-                    activity for activity in user_activities 
-                    if activity.activity_type == activity_type
-                ]
-            
-            # Sort by created_at descending (most recent first)
-            user_activities.sort(key=lambda x: x.created_at, reverse=True)
-            
-            # Apply pagination
-            total = len(user_activities)
-            paginated_activities = user_activities[skip:skip + limit]
-            
-            # Convert to response format
-            activities = [
-                ActivityLogResponse(
-                    id=activity.id,
-                    user_id=activity.user_id,
-                    activity_type=activity.activity_type,
-                    description=activity.description,
-                    details=activity.details,
-                    ip_address=activity.ip_address,
-                    user_agent=activity.user_agent,
-                    created_at=activity.created_at
-                )
-                for activity in paginated_activities
-            ]
-            
-            return ActivityLogListResponse(
-                activities=activities,
-                total=total,
-                page=skip // limit + 1 if limit > 0 else 1,
-                size=limit,
-                has_next=skip + limit < total
-            )
-            
-        except Exception as e:
-            logger.error(f"Error getting user activities: {str(e)}")
-            raise
+        
+        return _paginate(user_activities, skip, limit)
     
     def get_all_activities(
         self, 
         skip: int = 0, 
         limit: int = 100,
         activity_type: Optional[ActivityTypeEnum] = None
-    ) -> ActivityLogListResponse:
+    ) -> ActivityLogListDict:
         """Get all activities (admin only)."""
-        try:
-            # Filter by activity type if specified
-            activities = self._activities.copy()
-            if activity_type:
-                activities = [
-                    activity for activity in activities 
-                    if activity.activity_type == activity_type
-                ]
-            
-            # Sort by created_at descending (most recent first)
-            activities.sort(key=lambda x: x.created_at, reverse=True)
-            
-            # Apply pagination
-            total = len(activities)
-            paginated_activities = activities[skip:skip + limit]
-            
-            # Convert to response format
-            activity_responses = [
-                ActivityLogResponse(
-                    id=activity.id,
-                    user_id=activity.user_id,
-                    activity_type=activity.activity_type,
-                    description=activity.description,
-                    details=activity.details,
-                    ip_address=activity.ip_address,
-                    user_agent=activity.user_agent,
-                    created_at=activity.created_at
-                )
-                for activity in paginated_activities
-            ]
-            
-            return ActivityLogListResponse(
-                activities=activity_responses,
-                total=total,
-                page=skip // limit + 1 if limit > 0 else 1,
-                size=limit,
-                has_next=skip + limit < total
-            )
-            
-        except Exception as e:
-            logger.error(f"Error getting all activities: {str(e)}")
-            raise
+        # Filter by activity type if specified
+        activities = self._by_type.get(activity_type, []) if activity_type else self._activities
+        
+        return _paginate(activities, skip, limit)
     
     def get_activity_stats(self, user_id: Optional[str] = None) -> ActivityStatsResponse:
         """Get activity statistics."""
-        try:
-            # Filter activities by user if specified
-            activities = self._activities.copy()
-            if user_id:
-                activities = [
-                    activity for activity in activities 
-                    if activity.user_id == user_id
-                ]
-            
-            # Calculate statistics
-            total_activities = len(activities)
-            
-            # Activities by type
-            activities_by_type = defaultdict(int)
-            for activity in activities:
-                activities_by_type[activity.activity_type] += 1
-            
-            # Activities by day (last 7 days)
-            activities_by_day = defaultdict(int)
-            seven_days_ago = datetime.utcnow() - timedelta(days=7)
-            for activity in activities:
-                if activity.created_at >= seven_days_ago:
-                    day_key = activity.created_at.strftime("%Y-%m-%d")
-                    activities_by_day[day_key] += 1
-            
-            # Most active user
-            user_activity_counts = defaultdict(int)
-            for activity in self._activities:
-                user_activity_counts[activity.user_id] += 1
-            
-            most_active_user = max(user_activity_counts, key=user_activity_counts.get) if user_activity_counts else None
-            
-            # Recent activities (last 10)
-            recent_activities = sorted(
-                activities, 
-                key=lambda x: x.created_at, 
-                reverse=True
-            )[:10]
-            
-            recent_activity_responses = [
-                ActivityLogResponse(
-                    id=activity.id,
-                    user_id=activity.user_id,
-                    activity_type=activity.activity_type,
-                    description=activity.description,
-                    details=activity.details,
-                    ip_address=activity.ip_address,
-                    user_agent=activity.user_agent,
-                    created_at=activity.created_at
-                )
-                for activity in recent_activities
-            ]
-            
-            return ActivityStatsResponse(
-                total_activities=total_activities,
-                activities_by_type=dict(activities_by_type),
-                activities_by_day=dict(activities_by_day),
-                most_active_user=most_active_user,
-                recent_activities=recent_activity_responses
-            )
-            
-        except Exception as e:
-            logger.error(f"Error getting activity stats: {str(e)}")
-            raise
+        # Filter activities by user if specified
+        activities = self._by_user.get(user_id, []) if user_id else self._activities
+        
+        # Calculate statistics
+        total_activities = len(activities)
+        
+        # Activities by type
+        activities_by_type = Counter(activity.activity_type.value for activity in activities)
+        
+        # Activities by day (last 7 days)
+        activities_by_day = _count_by_day(activities, _week_start(activities))
+        
+        # Most active user
+        most_active_user = self._user_counts.most_common(1)[0][0] if self._user_counts else None
+        
+        # Recent activities (last 10); activities are stored oldest first
+        recent_activities = activities[-10:][::-1]
+        
+        return ActivityStatsResponse.model_construct(
+            total_activities=total_activities,
+            activities_by_type=dict(activities_by_type),
+            activities_by_day=activities_by_day,
+            most_active_user=most_active_user,
+            recent_activities=recent_activities
+        )
     
     def log_user_activity(
         self,
@@ -249,6 +168,23 @@ class ActivityService:
         )
         
         return self.create_activity(activity_data, user_id)
+    
+    def log_user_activity_bulk(self, events: List[Dict[str, Any]]) -> None:
+        """Log a batch of user activities in a single write.
+        
+        Each event holds the keyword arguments of log_user_activity.
+        """
+        created_at = datetime.utcnow()
+        activities = [
+            ActivityLogInDB(id=self._next_id + offset, created_at=created_at, **event)
+            for offset, event in enumerate(events)
+        ]
+        
+        for activity in activities:
+            self._store(activity)
+        self._next_id += len(activities)
+        
+        logger.info(f"Activities logged: {len(activities)} in bulk")
 
 # Global activity service instance
 activity_service = ActivityService()
\ No newline at end of file
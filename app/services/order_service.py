@@ -1,18 +1,41 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import date, datetime
+from bisect import bisect_left, insort
+from collections import defaultdict
+from itertools import islice
 import uuid
 
-from app.schemas.order_schemas import OrderCreate, OrderUpdate, OrderResponse
+from app.schemas.order_schemas import OrderCreate, OrderUpdate, OrderResponse, OrderDict
+
+def _remove_id(bucket: List[int], order_id: int) -> None:
+    """Remove an order ID from a sorted index bucket."""
+    index = bisect_left(bucket, order_id)
+    if index < len(bucket) and bucket[index] == order_id:
+        del bucket[index]
 
 class OrderService:
     def __init__(self):
         # In-memory storage for orders (in production, use a real database)
-        self._orders: Dict[int, Dict[str, Any]] = {}
+        self._orders: Dict[int, OrderResponse] = {}
         self._next_id = 1
         
+        # Sorted order IDs per status and creator; IDs ascend with created_at
+        self._by_status: Dict[str, List[int]] = defaultdict(list)
+        self._by_creator: Dict[str, List[int]] = defaultdict(list)
+        
+        # Number of stored orders created on self._today (UTC)
+        self._today: date = datetime.utcnow().date()
+        self._today_count = 0
+        
         # Initialize with some sample orders
         self._initialize_sample_orders()
     
+    def _roll_today(self, today: date) -> None:
+        """Reset the daily order count when the UTC date changes."""
+        if today != self._today:
+            self._today = today
+            self._today_count = 0
+    
     def _initialize_sample_orders(self):
         """Initialize with some sample orders for testing"""
         sample_orders = [
@@ -51,27 +74,30 @@ class OrderService:
         self._next_id += 1
         
         now = datetime.utcnow()
-        order_dict = {
-            "id": order_id,
-            "patient_first_name": order_data.patient_first_name,
-            "patient_last_name": order_data.patient_last_name,
-            "patient_date_of_birth": order_data.patient_date_of_birth,
-            "order_status": order_data.order_status,
-            "notes": order_data.notes,
-            "created_at": now,
-            "updated_at": now,
-            "created_by": created_by
-        }
-        
-        self._orders[order_id] = order_dict
-        return OrderResponse(**order_dict)
+        # order_data is already validated, so build the stored order without re-validating it
+        order = OrderResponse.model_construct(
+            id=order_id,
+            patient_first_name=order_data.patient_first_name,
+            patient_last_name=order_data.patient_last_name,
+            patient_date_of_birth=order_data.patient_date_of_birth,
+            order_status=order_data.order_status,
+            notes=order_data.notes,
+            created_at=now,
+            updated_at=now,
+            created_by=created_by
+        )
+        
+        self._orders[order_id] = order
+        self._by_status[order.order_status].append(order_id)
+        self._by_creator[created_by].append(order_id)
+        
+        self._roll_today(now.date())
+        self._today_count += 1
+        return order
     
     def get_order(self, order_id: int) -> Optional[OrderResponse]:
         """Get a single order by ID"""
-        order_dict = self._orders.get(order_id)
-        if order_dict:
-            return OrderResponse(**order_dict)
-        return None
+        return self._orders.get(order_id)
     
     def get_orders(
         self, 
@@ -79,75 +105,83 @@ class OrderService:
         limit: int = 100, 
         status: Optional[str] = None,
         created_by: Optional[str] = None
-    ) -> List[OrderResponse]:
-        """Get orders with pagination and filtering"""
-        orders = list(self._orders.values())
-        
-        # Apply filters
-        if status:
-            orders = [o for o in orders if o["order_status"] == status]
-        
-        if created_by:
-            orders = [o for o in orders if o["created_by"] == created_by]
-        
-        # Sort by created_at descending (newest first)
-        orders.sort(key=lambda x: x["created_at"], reverse=True)
+    ) -> List[OrderDict]:
+        """Get orders with pagination and filtering, as plain dicts"""
+        # Start from the smallest index that matches the filters
+        if status and created_by:
+            order_ids = min(self._by_status.get(status, []), self._by_creator.get(created_by, []), key=len)
+        elif status:
+            order_ids = self._by_status.get(status, [])
+        elif created_by:
+            order_ids = self._by_creator.get(created_by, [])
+        else:
+            order_ids = self._orders
+        
+        # IDs ascend with created_at, so walking them backwards yields newest first
+        orders = (self._orders[order_id] for order_id in reversed(order_ids))
+        if status and created_by:
+            orders = (o for o in orders if o.order_status == status and o.created_by == created_by)
         
         # Apply pagination
-        paginated_orders = orders[skip:skip + limit]
-        
-        return [OrderResponse(**order) for order in paginated_orders]
+        return [order.__dict__.copy() for order in islice(orders, skip, skip + limit)]
     
-    def update_order(self, order_id: int, order_data: OrderUpdate, updated_by: str) -> Optional[OrderResponse]:
-        """Update an existing order"""
-        if order_id not in self._orders:
+    def update_order(
+        self, 
+        order_id: int, 
+        order_data: OrderUpdate, 
+        updated_by: str
+    ) -> Optional[Tuple[OrderResponse, OrderResponse]]:
+        """Update an existing order, returning its previous and updated state"""
+        previous_order = self._orders.get(order_id)
+        if previous_order is None:
             return None
         
-        order_dict = self._orders[order_id]
-        
         # Update only provided fields
-        update_data = order_data.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            order_dict[field] = value
+        update_data = {field: getattr(order_data, field) for field in order_data.__pydantic_fields_set__}
+        update_data["updated_at"] = datetime.utcnow()
+        
+        order = previous_order.model_copy(update=update_data)
+        self._orders[order_id] = order
         
-        order_dict["updated_at"] = datetime.utcnow()
+        if order.order_status != previous_order.order_status:
+            _remove_id(self._by_status[previous_order.order_status], order_id)
+            insort(self._by_status[order.order_status], order_id)
         
-        return OrderResponse(**order_dict)
+        return previous_order, order
     
-    def delete_order(self, order_id: int) -> bool:
-        """Delete an order"""
-        if order_id in self._orders:
-            del self._orders[order_id]
-            return True
-        return False
+    def delete_order(self, order_id: int) -> Optional[OrderResponse]:
+        """Delete an order, returning the deleted order"""
+        order = self._orders.pop(order_id, None)
+        if order is not None:
+            _remove_id(self._by_status[order.order_status], order_id)
+            _remove_id(self._by_creator[order.created_by], order_id)
+            if order.created_at.date() == self._today:
+                self._today_count -= 1
+        return order
     
     def get_order_stats(self) -> Dict[str, Any]:
         """Get order statistics"""
-        orders = list(self._orders.values())
-        
         # Count by status
-        status_counts = {}
-        for order in orders:
-            status = order["order_status"]
-            status_counts[status] = status_counts.get(status, 0) + 1
+        status_counts = {status: len(order_ids) for status, order_ids in self._by_status.items() if order_ids}
         
-        # Get recent orders (last 5)
-        recent_orders = sorted(orders, key=lambda x: x["created_at"], reverse=True)[:5]
+        # Get recent orders (last 5); orders are stored oldest first
+        recent_orders = list(islice(reversed(self._orders.values()), 5))
         
         # Count orders created today
-        today = datetime.utcnow().date()
-        orders_today = sum(1 for order in orders if order["created_at"].date() == today)
+        self._roll_today(datetime.utcnow().date())
         
         return {
-            "total_orders": len(orders),
+            "total_orders": len(self._orders),
             "orders_by_status": status_counts,
-            "recent_orders": [OrderResponse(**order) for order in recent_orders],
-            "orders_today": orders_today
+            "recent_orders": recent_orders,
+            "orders_today": self._today_count
         }
     
-    def get_orders_count(self) -> int:
-        """Get total number of orders"""
-        return len(self._orders)
+    def get_orders_count(self, status: Optional[str] = None) -> int:
+        """Get total number of orders, optionally filtered by status"""
+        if status is None:
+            return len(self._orders)
+        return len(self._by_status.get(status, []))
 
 # Global instance
 order_service = OrderService()
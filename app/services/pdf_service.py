@@ -1,61 +1,164 @@
 import os
+import io
 import asyncio
-from typing import List, Dict, Any, Optional
+import tempfile
+from typing import List, Dict, Any, Optional, Union, BinaryIO, Iterator, Tuple
 from pathlib import Path
 import pdfplumber
+import pypdfium2
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Executor, ThreadPoolExecutor
 import hashlib
+import mmap
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 import re
+import secrets
+import threading
+import time
+import xxhash
 """
 LlamaParse is an optional dependency used only when OCR/cloud parsing is enabled.
 We avoid importing it at module import time to prevent startup failures if the
 library (or its transitive deps like llama_index) is not installed.
 """
 
-from app.core.config import settings
+from app.core.config import settings, ALLOWED_FILE_TYPES, EXTRACT_TABLES
 from app.core.exceptions import PDFProcessingError, BatchProcessingError, FileValidationError
 
 logger = logging.getLogger(__name__)
 
+# pdfium must not be entered from two threads at once, even for different documents
+_pdfium_lock = threading.Lock()
+
+def _new_hasher():
+    """Create a hasher for the configured dedup fingerprint algorithm."""
+    if settings.HASH_ALGO == "xxh3_128":
+        return xxhash.xxh3_128()
+    return hashlib.new(settings.HASH_ALGO)
+
+def _map_file(file_path: Path) -> mmap.mmap:
+    """Map a file read-only, hinting the kernel that it is read front to back."""
+    with open(file_path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    return mapped
+
+def _hash_buffer(data) -> str:
+    """Fingerprint an in-memory buffer with the configured algorithm."""
+    hasher = _new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+# (second, ISO timestamp) of the last _now_iso() call
+_now_iso_cache: Tuple[int, str] = (0, "")
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO string, formatted at most once per second."""
+    global _now_iso_cache
+    now = int(time.time())
+    if now != _now_iso_cache[0]:
+        # A single tuple assignment, so concurrent callers never see a torn pair
+        _now_iso_cache = (now, datetime.utcfromtimestamp(now).isoformat())
+    return _now_iso_cache[1]
+
+@lru_cache(maxsize=128)
+def _search_pattern(query: str) -> re.Pattern:
+    """Compile a case-insensitive pattern that finds overlapping occurrences of a query."""
+    return re.compile(f"(?=({re.escape(query)}))", re.IGNORECASE)
+
+def _find_spans(haystack: str, needle: str, length: int):
+    """Yield (start, end) of every occurrence of needle, overlapping ones included."""
+    pos = haystack.find(needle)
+    while pos != -1:
+        yield pos, pos + length
+        pos = haystack.find(needle, pos + 1)
+
 class PDFProcessor:
     """PDF processing service with batch processing capabilities."""
     
+    # Clinical field labels, tried in priority order. The folded patterns below match them
+    # against str.lower() text, which only agrees with IGNORECASE if every character
+    # IGNORECASE treats as a label letter also lowers to that letter. For ASCII labels
+    # the exceptions are the letters in _FOLD_ONLY_CHARS; keep labels ASCII, and extend
+    # that tuple if IGNORECASE gains another such fold for a letter a label uses.
+    _NAME_LABELS = (
+        r'patient\s+name\s*:\s*([^\n\r]+)',
+        r'patient\s*:\s*([^\n\r]+)',
+        r'name\s*:\s*([^\n\r]+)'
+    )
+    _DOB_LABELS = (
+        r'dob\s*:\s*([^\n\r]+)',
+        r'date\s+of\s+birth\s*:\s*([^\n\r]+)',
+        r'birth\s+date\s*:\s*([^\n\r]+)',
+        r'born\s*:\s*([^\n\r]+)'
+    )
+    # Case-sensitive patterns for lowered text let re use its fast literal prefix search,
+    # which IGNORECASE patterns can't; those remain for text whose length lowering changes
+    _NAME_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in _NAME_LABELS)
+    _DOB_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in _DOB_LABELS)
+    _NAME_PATTERNS_FOLDED = tuple(re.compile(pattern) for pattern in _NAME_LABELS)
+    _DOB_PATTERNS_FOLDED = tuple(re.compile(pattern) for pattern in _DOB_LABELS)
+    # Dotless i and long s: IGNORECASE matches them as "i" and "s", str.lower() keeps them
+    _FOLD_ONLY_CHARS = ("\u0131", "\u017f")
+    # Every label contains one of these words, so lowered text without any of them can't match
+    _LABEL_KEYWORDS = ("patient", "name", "dob", "birth", "born")
+    _DOB_JUNK = re.compile(r'[^\d/\-\s]')
+    # Characters of combined page text echoed back in clinical responses
+    _DEBUG_TEXT_LENGTH = 1000
+    
     def __init__(self):
         self.upload_dir = Path(settings.UPLOAD_DIR)
         self.upload_dir.mkdir(exist_ok=True)
         self.executor = ThreadPoolExecutor(max_workers=settings.MAX_CONCURRENT_TASKS)
+        self._llamaparse = None
     
-    def validate_file(self, file_path: Path, filename: str = None) -> None:
-        """Validate PDF file."""
-        if not file_path.exists():
+    def validate_file(self, file_path: Path, filename: str = None) -> os.stat_result:
+        """Validate PDF file, returning its stat result for reuse."""
+        try:
+            stat_result = file_path.stat()
+        except FileNotFoundError:
             raise FileValidationError(f"File not found", filename)
         
-        if file_path.stat().st_size > settings.MAX_FILE_SIZE:
+        self._validate_size_and_type(stat_result.st_size, file_path.suffix, filename)
+        return stat_result
+    
+    def _validate_size_and_type(self, file_size: int, suffix: str, filename: str = None) -> None:
+        """Validate PDF size and file type."""
+        if file_size > settings.MAX_FILE_SIZE:
             raise FileValidationError(
                 f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE} bytes",
                 filename
             )
         
-        if file_path.suffix.lower() not in settings.ALLOWED_FILE_TYPES:
+        if suffix.lower() not in ALLOWED_FILE_TYPES:
             raise FileValidationError(
                 f"File type not allowed. Allowed types: {settings.ALLOWED_FILE_TYPES}",
                 filename
             )
     
-    def extract_text_from_pdf(self, file_path: Path) -> Dict[str, Any]:
-        """Extract text from a single PDF file."""
+    def extract_text_from_pdf(self, file_path: Path, pages_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Extract text from a single PDF file.
+        
+        pages_result skips standard extraction when the pages were already extracted, e.g. in a worker process.
+        """
+        filename = file_path.name
         try:
-            self.validate_file(file_path, file_path.name)
+            stat_result = self.validate_file(file_path, filename)
             
             # First try standard text extraction
-            result = self._try_standard_extraction(file_path)
+            if pages_result is None:
+                result = self._try_standard_extraction(file_path, filename, stat_result.st_size)
+            else:
+                result = pages_result
+                result["file_hash"] = self._generate_file_hash(file_path)
             
             # If no text was extracted (image-based PDF), use LlamaParse
             if result["total_text_length"] == 0:
-                logger.info(f"No text found in {file_path.name}, attempting LlamaParse extraction")
-                result = self._extract_text_with_llamaparse(file_path)
+                logger.info(f"No text found in {filename}, attempting LlamaParse extraction")
+                result = self._extract_text_with_llamaparse(file_path, result["file_size"])
             
             return result
             
@@ -65,15 +168,41 @@ class PDFProcessor:
             logger.error(f"Error processing PDF {file_path}: {str(e)}")
             raise PDFProcessingError(
                 f"Failed to process PDF: {str(e)}",
-                details=f"File: {file_path.name}"
+                details=f"File: {filename}"
             )
     
-    def _try_standard_extraction(self, file_path: Path) -> Dict[str, Any]:
-        """Try standard PDF text extraction first."""
+    def _try_standard_extraction(self, file_path: Path, filename: str, file_size: int) -> Dict[str, Any]:
+        """Try standard PDF text extraction first; file_size comes from validate_file's stat."""
+        # Map the file once and share it between pdfplumber and the hasher; pdfium reads the file itself
+        with _map_file(file_path) as mapped:
+            result = self._extract_pages(mapped if EXTRACT_TABLES else file_path, filename, file_size)
+            
+            # Generate file hash for deduplication
+            result["file_hash"] = _hash_buffer(mapped)
+        
+        return result
+    
+    def _try_standard_extraction_bytes(self, data: bytes, filename: str) -> Dict[str, Any]:
+        """Try standard PDF text extraction on an in-memory PDF."""
+        result = self._extract_pages(io.BytesIO(data) if EXTRACT_TABLES else data, filename, len(data))
+        
+        # Generate file hash for deduplication
+        result["file_hash"] = _hash_buffer(data)
+        
+        return result
+    
+    def _extract_pages(
+        self, source: Union[Path, bytes, BinaryIO, mmap.mmap], filename: str, file_size: int, stride: int = 1, offset: int = 0
+    ) -> Dict[str, Any]:
+        """Extract text, tables and clinical data page by page.
+        
+        Uses pdfplumber, or pdfium for text only when EXTRACT_TABLES is off (source is then a path or bytes).
+        With a stride, only every stride-th page starting at the 0-based offset is extracted.
+        """
         result = {
-            "filename": file_path.name,
-            "file_size": file_path.stat().st_size,
-            "processed_at": datetime.utcnow().isoformat(),
+            "filename": filename,
+            "file_size": file_size,
+            "processed_at": _now_iso(),
             "pages": [],
             "total_pages": 0,
             "total_text_length": 0,
@@ -82,24 +211,33 @@ class PDFProcessor:
             "clinical_data": {}
         }
         
-        with pdfplumber.open(file_path) as pdf:
+        if EXTRACT_TABLES:
+            self._read_pages_pdfplumber(source, result, stride, offset)
+        else:
+            with _pdfium_lock:
+                self._read_pages_pdfium(source, result, stride, offset)
+        
+        return result
+    
+    def _read_pages_pdfplumber(self, source: Union[BinaryIO, mmap.mmap], result: Dict[str, Any], stride: int, offset: int) -> None:
+        """Fill result with text, tables and page boxes read by pdfplumber."""
+        with pdfplumber.open(source) as pdf:
             result["total_pages"] = len(pdf.pages)
             result["metadata"] = pdf.metadata or {}
             result["metadata"]["extraction_method"] = "standard"
             
-            for page_num, page in enumerate(pdf.pages, 1):
+            for page_num, page in islice(enumerate(pdf.pages, 1), offset, None, stride):
                 try:
                     text = page.extract_text() or ""
                     
-                    # Extract tables if any
-                    tables = page.extract_tables()
+                    # Extract tables if any; a page without text (e.g. a scan) has none worth reading
                     table_data = []
-                    if tables:
-                        for table in tables:
+                    if text.strip():
+                        for table in page.extract_tables():
                             if table:  # Skip empty tables
                                 table_data.append(table)
                     
-                    page_info = {
+                    self._append_page(result, {
                         "page_number": page_num,
                         "text": text,
                         "text_length": len(text),
@@ -107,78 +245,121 @@ class PDFProcessor:
                         "bbox": page.bbox,
                         "width": page.width,
                         "height": page.height
-                    }
-                    
-                    # Extract clinical data from any page with text
-                    if text.strip() and not result.get("clinical_data"):
-                        clinical_data = self._extract_clinical_data(text)
-                        if clinical_data.get("patient_name", {}).get("full_name") or clinical_data.get("date_of_birth"):
-                            result["clinical_data"] = clinical_data
-                            page_info["clinical_data"] = clinical_data
-                    
-                    result["pages"].append(page_info)
-                    result["total_text_length"] += len(text)
+                    })
                     
                 except Exception as e:
-                    logger.warning(f"Error processing page {page_num}: {str(e)}")
-                    result["pages"].append({
+                    self._append_failed_page(result, page_num, e)
+    
+    def _read_pages_pdfium(self, source: Union[Path, bytes], result: Dict[str, Any], stride: int, offset: int) -> None:
+        """Fill result with the text layer read by pdfium; tables are left empty."""
+        pdf = pypdfium2.PdfDocument(source)
+        try:
+            result["total_pages"] = len(pdf)
+            result["metadata"] = pdf.get_metadata_dict(skip_empty=True)
+            result["metadata"]["extraction_method"] = "standard_text_only"
+            
+            for page_index in range(offset, len(pdf), stride):
+                page_num = page_index + 1
+                try:
+                    page = pdf[page_index]
+                    textpage = page.get_textpage()
+                    # pdfium ends lines with CRLF; match pdfplumber's output
+                    text = textpage.get_text_range().replace("\r\n", "\n")
+                    width, height = page.get_size()
+                    textpage.close()
+                    page.close()
+                    
+                    self._append_page(result, {
                         "page_number": page_num,
-                        "text": "",
-                        "text_length": 0,
+                        "text": text,
+                        "text_length": len(text),
                         "tables": [],
-                        "error": str(e)
+                        "bbox": (0, 0, width, height),
+                        "width": width,
+                        "height": height
                     })
-        
-        # Generate file hash for deduplication
-        result["file_hash"] = self._generate_file_hash(file_path)
-        
-        return result
+                    
+                except Exception as e:
+                    self._append_failed_page(result, page_num, e)
+        finally:
+            pdf.close()
+    
+    def _append_page(self, result: Dict[str, Any], page_info: Dict[str, Any]) -> None:
+        """Add an extracted page to result, tagging the first page that yields clinical data."""
+        text = page_info["text"]
+        
+        # Extract clinical data from any page with text
+        if text.strip() and not result.get("clinical_data"):
+            clinical_data = self._extract_clinical_data(text)
+            if clinical_data.get("patient_name", {}).get("full_name") or clinical_data.get("date_of_birth"):
+                result["clinical_data"] = clinical_data
+                page_info["clinical_data"] = clinical_data
+        
+        result["pages"].append(page_info)
+        result["total_text_length"] += len(text)
+    
+    def _append_failed_page(self, result: Dict[str, Any], page_num: int, error: Exception) -> None:
+        """Record a page that could not be read."""
+        logger.warning(f"Error processing page {page_num}: {str(error)}")
+        result["pages"].append({
+            "page_number": page_num,
+            "text": "",
+            "text_length": 0,
+            "tables": [],
+            "error": str(error)
+        })
     
     def _generate_file_hash(self, file_path: Path) -> str:
-        """Generate SHA-256 hash of file for deduplication."""
-        hash_sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
-    
-    def _extract_text_with_llamaparse(self, file_path: Path) -> Dict[str, Any]:
-        """Extract text using LlamaParse (cloud parser with built-in OCR)."""
-        try:
-            if not settings.LLAMAPARSE_API_KEY:
-                raise PDFProcessingError(
-                    "LlamaParse API key is not configured. Set LLAMAPARSE_API_KEY in environment.",
-                    details=f"File: {file_path.name}"
-                )
-            # Lazy import to avoid import errors at app startup when optional deps are missing
-            from llama_parse import LlamaParse
-
-            parser = LlamaParse(
-                api_key=settings.LLAMAPARSE_API_KEY,
-                result_type=settings.LLAMAPARSE_RESULT_TYPE or "text",
+        """Generate a hash of the file for deduplication."""
+        with _map_file(file_path) as mapped:
+            return _hash_buffer(mapped)
+    
+    def _iter_llamaparse_pages(self, file_path: Path) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) for each document LlamaParse returns."""
+        if not settings.LLAMAPARSE_API_KEY:
+            raise PDFProcessingError(
+                "LlamaParse API key is not configured. Set LLAMAPARSE_API_KEY in environment.",
+                details=f"File: {file_path.name}"
             )
-            # LlamaParse returns a list of documents; each typically contains text content
-            docs = parser.load_data(str(file_path))
-
+        parser = self._get_llamaparse()
+        # LlamaParse returns a list of documents; each typically contains text content
+        for idx, d in enumerate(parser.load_data(str(file_path)), start=1):
+            yield idx, getattr(d, "text", None) or getattr(d, "page_content", "") or ""
+    
+    def _extract_text_with_llamaparse(
+        self, file_path: Path, file_size: Optional[int] = None, clinical_only: bool = False
+    ) -> Dict[str, Any]:
+        """Extract text using LlamaParse (cloud parser with built-in OCR).
+        
+        file_size saves a stat() when the caller already knows it. With clinical_only, pages are
+        only kept while the clinical summary still reads them; the rest are just counted.
+        """
+        try:
             # Aggregate texts and approximate per-page segmentation
             pages: List[Dict[str, Any]] = []
+            total_pages = 0
             total_text_length = 0
-            for idx, d in enumerate(docs, start=1):
-                page_text = getattr(d, "text", None) or getattr(d, "page_content", "") or ""
+            kept_text_length = 0
+            for idx, page_text in self._iter_llamaparse_pages(file_path):
+                total_pages = idx
+                total_text_length += len(page_text)
+                # Clinical data comes from page 2 or 1, debug text from the first characters
+                if clinical_only and idx > 2 and kept_text_length >= self._DEBUG_TEXT_LENGTH:
+                    continue
                 pages.append({
                     "page_number": idx,
                     "text": page_text,
                     "text_length": len(page_text),
                     "tables": [],
                 })
-                total_text_length += len(page_text)
+                kept_text_length += len(page_text) + 1
 
             result: Dict[str, Any] = {
                 "filename": file_path.name,
-                "file_size": file_path.stat().st_size,
-                "processed_at": datetime.utcnow().isoformat(),
+                "file_size": file_size if file_size is not None else file_path.stat().st_size,
+                "processed_at": _now_iso(),
                 "pages": pages,
-                "total_pages": len(pages),
+                "total_pages": total_pages,
                 "total_text_length": total_text_length,
                 "metadata": {"extraction_method": "LlamaParse"},
                 "status": "success",
@@ -213,6 +394,18 @@ class PDFProcessor:
                 details=f"File: {file_path.name}"
             )
     
+    def _get_llamaparse(self):
+        """Return the processor's LlamaParse client, creating it on first use."""
+        if self._llamaparse is None:
+            # Lazy import to avoid import errors at app startup when optional deps are missing
+            from llama_parse import LlamaParse
+
+            self._llamaparse = LlamaParse(
+                api_key=settings.LLAMAPARSE_API_KEY,
+                result_type=settings.LLAMAPARSE_RESULT_TYPE or "text",
+            )
+        return self._llamaparse
+    
     def _extract_clinical_data(self, text: str) -> Dict[str, Any]:
         """Extract structured clinical data from text."""
         clinical_data = {
@@ -228,19 +421,20 @@ class PDFProcessor:
         if not text:
             return clinical_data
         
-        # Convert to lowercase for pattern matching but preserve original case for extraction
-        text_lower = text.lower()
-        
-        # Pattern for Patient Name extraction
-        # Look for "Patient Name:" followed by name
-        patient_name_patterns = [
-            r'patient\s+name\s*:\s*([^\n\r]+)',
-            r'patient\s*:\s*([^\n\r]+)',
-            r'name\s*:\s*([^\n\r]+)'
-        ]
+        # Search lowered text when its offsets still line up with the original and it has
+        # no characters that only IGNORECASE folds into label letters
+        folded = text.lower()
+        if len(folded) == len(text) and not any(char in folded for char in self._FOLD_ONLY_CHARS):
+            if ":" not in folded or not any(keyword in folded for keyword in self._LABEL_KEYWORDS):
+                clinical_data["extraction_confidence"] = "low"
+                return clinical_data
+            haystack, name_patterns, dob_patterns = folded, self._NAME_PATTERNS_FOLDED, self._DOB_PATTERNS_FOLDED
+        else:
+            haystack, name_patterns, dob_patterns = text, self._NAME_PATTERNS, self._DOB_PATTERNS
         
-        for pattern in patient_name_patterns:
-            match = re.search(pattern, text_lower)
+        # Patient Name extraction; patterns are tried in priority order
+        for pattern in name_patterns:
+            match = pattern.search(haystack)
             if match:
                 full_name = text[match.start(1):match.end(1)].strip()
                 clinical_data["patient_name"]["full_name"] = full_name
@@ -255,20 +449,13 @@ class PDFProcessor:
                 
                 break
         
-        # Pattern for Date of Birth extraction
-        dob_patterns = [
-            r'dob\s*:\s*([^\n\r]+)',
-            r'date\s+of\s+birth\s*:\s*([^\n\r]+)',
-            r'birth\s+date\s*:\s*([^\n\r]+)',
-            r'born\s*:\s*([^\n\r]+)'
-        ]
-        
+        # Date of Birth extraction
         for pattern in dob_patterns:
-            match = re.search(pattern, text_lower)
+            match = pattern.search(haystack)
             if match:
                 dob_text = text[match.start(1):match.end(1)].strip()
                 # Clean up common OCR artifacts
-                dob_text = re.sub(r'[^\d/\-\s]', '', dob_text)
+                dob_text = self._DOB_JUNK.sub('', dob_text)
                 clinical_data["date_of_birth"] = dob_text
                 break
         
@@ -287,45 +474,59 @@ class PDFProcessor:
         
         return clinical_data
     
-    def extract_clinical_data_only(self, file_path: Path) -> Dict[str, Any]:
-        """Extract only clinical data from PDF without full text content."""
+    def count_pages(self, file_path: Path) -> int:
+        """Count a PDF's pages with pdfium, which only reads the page tree; 0 if it can't be opened."""
+        with _pdfium_lock:
+            try:
+                pdf = pypdfium2.PdfDocument(file_path)
+            except Exception:
+                # Extraction reports the real error
+                return 0
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    
+    def extract_page_slice(self, file_path: Path, stride: int, offset: int) -> Dict[str, Any]:
+        """Extract every stride-th page of a PDF, starting at the 0-based offset."""
+        filename = file_path.name
+        try:
+            stat_result = self.validate_file(file_path, filename)
+            with _map_file(file_path) as mapped:
+                return self._extract_pages(
+                    mapped if EXTRACT_TABLES else file_path, filename, stat_result.st_size, stride, offset
+                )
+            
+        except FileValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing PDF {file_path}: {str(e)}")
+            raise PDFProcessingError(
+                f"Failed to process PDF: {str(e)}",
+                details=f"File: {filename}"
+            )
+    
+    def extract_clinical_data_only(self, file_path: Path, pages_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Extract only clinical data from PDF without full text content.
+        
+        pages_result skips standard extraction when the pages were already extracted, e.g. in worker processes.
+        """
+        filename = file_path.name
         try:
-            self.validate_file(file_path, file_path.name)
+            stat_result = self.validate_file(file_path, filename)
             
             # First try standard text extraction
-            result = self._try_standard_extraction(file_path)
+            if pages_result is None:
+                result = self._try_standard_extraction(file_path, filename, stat_result.st_size)
+            else:
+                result = pages_result
+                result["file_hash"] = self._generate_file_hash(file_path)
             
             # If no text was extracted (image-based PDF), use LlamaParse
             if result["total_text_length"] == 0:
-                logger.info(f"No text found in {file_path.name}, attempting LlamaParse extraction")
-                try:
-                    result = self._extract_text_with_llamaparse(file_path)
-                except ImportError as e:
-                    logger.warning(f"LlamaParse not available: {str(e)}")
-                    result["status"] = "partial_success"
-                    result["message"] = "Image-based PDF detected. OCR service not available. Please install llama-parse for full text extraction."
-                    result["metadata"]["extraction_method"] = "standard_no_ocr"
-                except Exception as e:
-                    logger.warning(f"LlamaParse extraction failed: {str(e)}")
-                    result["status"] = "partial_success"
-                    result["message"] = f"Image-based PDF detected. OCR extraction failed: {str(e)}"
-                    result["metadata"]["extraction_method"] = "standard_ocr_failed"
-            
-            # Create lightweight response with only essential data
-            clinical_response = {
-                "filename": result["filename"],
-                "file_size": result["file_size"],
-                "processed_at": result["processed_at"],
-                "total_pages": result["total_pages"],
-                "extraction_method": result["metadata"].get("extraction_method", "unknown"),
-                "clinical_data": result.get("clinical_data", {}),
-                "file_hash": result["file_hash"],
-                "status": result["status"],
-                # Temporarily include extracted text for debugging (all pages combined)
-                "debug_extracted_text": " ".join([page.get("text", "") for page in result.get("pages", [])])[:1000]
-            }
+                result = self._llamaparse_fallback(result, file_path)
             
-            return clinical_response
+            return self._clinical_response(result)
             
         except FileValidationError:
             raise
@@ -333,28 +534,160 @@ class PDFProcessor:
             logger.error(f"Error processing PDF {file_path}: {str(e)}")
             raise PDFProcessingError(
                 f"Failed to process PDF: {str(e)}",
-                details=f"File: {file_path.name}"
+                details=f"File: {filename}"
             )
     
-    async def process_single_pdf(self, file_path: Path) -> Dict[str, Any]:
-        """Process a single PDF asynchronously."""
+    def extract_pages_bytes(self, data: bytes, filename: str) -> Dict[str, Any]:
+        """Run standard extraction on an in-memory PDF, without the LlamaParse fallback."""
+        try:
+            self._validate_size_and_type(len(data), Path(filename).suffix, filename)
+            return self._try_standard_extraction_bytes(data, filename)
+            
+        except FileValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing PDF {filename}: {str(e)}")
+            raise PDFProcessingError(
+                f"Failed to process PDF: {str(e)}",
+                details=f"File: {filename}"
+            )
+    
+    def extract_clinical_data_only_bytes(
+        self, data: bytes, filename: str, pages_result: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Extract only clinical data from an in-memory PDF.
+        
+        pages_result skips standard extraction when it already ran in a worker process.
+        """
+        try:
+            self._validate_size_and_type(len(data), Path(filename).suffix, filename)
+            
+            # First try standard text extraction
+            if pages_result is None:
+                result = self._try_standard_extraction_bytes(data, filename)
+            else:
+                result = pages_result
+            
+            # If no text was extracted (image-based PDF), use LlamaParse, which reads from disk
+            if result["total_text_length"] == 0:
+                fd, temp_file_name = tempfile.mkstemp(suffix='.pdf', dir=settings.TEMP_UPLOAD_DIR)
+                try:
+                    with os.fdopen(fd, 'wb') as temp_file:
+                        temp_file.write(data)
+                    result = self._llamaparse_fallback(result, Path(temp_file_name))
+                finally:
+                    os.unlink(temp_file_name)
+                result["filename"] = filename
+            
+            return self._clinical_response(result)
+            
+        except FileValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing PDF {filename}: {str(e)}")
+            raise PDFProcessingError(
+                f"Failed to process PDF: {str(e)}",
+                details=f"File: {filename}"
+            )
+    
+    def _llamaparse_fallback(self, result: Dict[str, Any], file_path: Path) -> Dict[str, Any]:
+        """Run LlamaParse on a PDF without a text layer, marking the result partial if it fails."""
+        logger.info(f"No text found in {result['filename']}, attempting LlamaParse extraction")
+        try:
+            return self._extract_text_with_llamaparse(file_path, result["file_size"], clinical_only=True)
+        except ImportError as e:
+            logger.warning(f"LlamaParse not available: {str(e)}")
+            result["status"] = "partial_success"
+            result["message"] = "Image-based PDF detected. OCR service not available. Please install llama-parse for full text extraction."
+            result["metadata"]["extraction_method"] = "standard_no_ocr"
+        except Exception as e:
+            logger.warning(f"LlamaParse extraction failed: {str(e)}")
+            result["status"] = "partial_success"
+            result["message"] = f"Image-based PDF detected. OCR extraction failed: {str(e)}"
+            result["metadata"]["extraction_method"] = "standard_ocr_failed"
+        return result
+    
+    def _clinical_response(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Create lightweight response with only essential data."""
+        return {
+            "filename": result["filename"],
+            "file_size": result["file_size"],
+            "processed_at": result["processed_at"],
+            "total_pages": result["total_pages"],
+            "extraction_method": result["metadata"].get("extraction_method", "unknown"),
+            "clinical_data": result.get("clinical_data", {}),
+            "file_hash": result["file_hash"],
+            "status": result["status"],
+            # Temporarily include extracted text for debugging (all pages combined)
+            "debug_extracted_text": _joined_prefix(
+                (page.get("text", "") for page in result.get("pages", [])), self._DEBUG_TEXT_LENGTH
+            )
+        }
+    
+    async def process_single_pdf(self, file_path: Path, executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """Process a single PDF asynchronously.
+        
+        On the given process pool only pdfplumber extraction runs in the worker; hashing and the
+        network-bound LlamaParse fallback finish on the processor's threads.
+        """
         loop = asyncio.get_event_loop()
+        pages_result = None
+        if executor is not None:
+            pages_result = await loop.run_in_executor(executor, _extract_page_slice, file_path, 1, 0)
         return await loop.run_in_executor(
             self.executor, 
             self.extract_text_from_pdf, 
-            file_path
+            file_path,
+            pages_result
         )
     
-    async def process_single_pdf_clinical_only(self, file_path: Path) -> Dict[str, Any]:
-        """Process a single PDF asynchronously, returning only clinical data."""
+    async def process_single_pdf_clinical_only(
+        self, file_path: Path, executor: Optional[Executor] = None, split_pages: bool = True
+    ) -> Dict[str, Any]:
+        """Process a single PDF asynchronously, returning only clinical data.
+        
+        On the given process pool the pages are split into interleaved slices, at most one per
+        worker and per page, unless split_pages is off; otherwise the whole file runs on the processor's threads.
+        Either way hashing and the network-bound LlamaParse fallback finish on the threads.
+        """
         loop = asyncio.get_event_loop()
+        pages_result = None
+        if executor is not None and not split_pages:
+            pages_result = await loop.run_in_executor(executor, _extract_page_slice, file_path, 1, 0)
+        elif executor is not None:
+            page_count = await loop.run_in_executor(self.executor, self.count_pages, file_path)
+            stride = max(1, min(settings.MAX_CONCURRENT_TASKS, page_count))
+            slices = await asyncio.gather(*(
+                loop.run_in_executor(executor, _extract_page_slice, file_path, stride, offset)
+                for offset in range(stride)
+            ))
+            pages_result = _merge_page_slices(slices)
         return await loop.run_in_executor(
             self.executor, 
             self.extract_clinical_data_only, 
-            file_path
+            file_path,
+            pages_result
         )
     
-    async def process_batch_pdfs(self, file_paths: List[Path]) -> Dict[str, Any]:
+    async def process_single_pdf_clinical_only_bytes(
+        self, data: bytes, filename: str, executor: Optional[Executor] = None
+    ) -> Dict[str, Any]:
+        """Process an in-memory PDF asynchronously, returning only clinical data."""
+        loop = asyncio.get_event_loop()
+        pages_result = None
+        if executor is not None:
+            pages_result = await loop.run_in_executor(executor, _extract_pages_bytes, data, filename)
+        return await loop.run_in_executor(
+            self.executor, 
+            self.extract_clinical_data_only_bytes, 
+            data,
+            filename,
+            pages_result
+        )
+    
+    async def process_batch_pdfs(
+        self, file_paths: List[Path], executor: Optional[Executor] = None
+    ) -> Dict[str, Any]:
         """Process multiple PDFs in batch with concurrency control."""
         if not file_paths:
             raise BatchProcessingError("No files provided for batch processing")
@@ -365,8 +698,8 @@ class PDFProcessor:
             )
         
         batch_result = {
-            "batch_id": hashlib.md5(str(datetime.utcnow()).encode()).hexdigest()[:12],
-            "processed_at": datetime.utcnow().isoformat(),
+            "batch_id": secrets.token_hex(6),
+            "processed_at": _now_iso(),
             "total_files": len(file_paths),
             "successful": [],
             "failed": [],
@@ -378,27 +711,21 @@ class PDFProcessor:
             }
         }
         
-        # Process files concurrently
-        tasks = [self.process_single_pdf(file_path) for file_path in file_paths]
+        # Process files concurrently; results come back in submission order
+        results = await _gather_bounded(self.process_single_pdf(file_path, executor) for file_path in file_paths)
         
         try:
-            for i, task in enumerate(asyncio.as_completed(tasks)):
-                try:
-                    result = await task
-                    batch_result["successful"].append(result)
-                    batch_result["summary"]["success_count"] += 1
-                    batch_result["summary"]["total_pages"] += result["total_pages"]
-                    batch_result["summary"]["total_text_length"] += result["total_text_length"]
-                    
-                except Exception as e:
-                    error_info = {
-                        "filename": file_paths[i].name if i < len(file_paths) else "unknown",
-                        "error": str(e),
-                        "error_type": type(e).__name__
-                    }
-                    batch_result["failed"].append(error_info)
+            for file_path, result in zip(file_paths, results):
+                if isinstance(result, Exception):
+                    batch_result["failed"].append(_failure_info(file_path, result))
                     batch_result["summary"]["error_count"] += 1
-                    logger.error(f"Failed to process {file_paths[i]}: {str(e)}")
+                    logger.error(f"Failed to process {file_path}: {str(result)}")
+                    continue
+                
+                batch_result["successful"].append(result)
+                batch_result["summary"]["success_count"] += 1
+                batch_result["summary"]["total_pages"] += result["total_pages"]
+                batch_result["summary"]["total_text_length"] += result["total_text_length"]
         
         except Exception as e:
             logger.error(f"Batch processing error: {str(e)}")
@@ -409,7 +736,9 @@ class PDFProcessor:
         
         return batch_result
     
-    async def process_batch_pdfs_clinical_only(self, file_paths: List[Path]) -> Dict[str, Any]:
+    async def process_batch_pdfs_clinical_only(
+        self, file_paths: List[Path], executor: Optional[Executor] = None
+    ) -> Dict[str, Any]:
         """Process multiple PDFs in batch with concurrency control, returning only clinical data."""
         if not file_paths:
             raise BatchProcessingError("No files provided for batch processing")
@@ -420,8 +749,8 @@ class PDFProcessor:
             )
         
         batch_result = {
-            "batch_id": hashlib.md5(str(datetime.utcnow()).encode()).hexdigest()[:12],
-            "processed_at": datetime.utcnow().isoformat(),
+            "batch_id": secrets.token_hex(6),
+            "processed_at": _now_iso(),
             "total_files": len(file_paths),
             "successful": [],
             "failed": [],
@@ -433,30 +762,27 @@ class PDFProcessor:
             }
         }
         
-        # Process files concurrently
-        tasks = [self.process_single_pdf_clinical_only(file_path) for file_path in file_paths]
+        # Process files concurrently, one whole file per worker; results come back in submission order
+        results = await _gather_bounded(
+            self.process_single_pdf_clinical_only(file_path, executor, split_pages=False)
+            for file_path in file_paths
+        )
         
         try:
-            for i, task in enumerate(asyncio.as_completed(tasks)):
-                try:
-                    result = await task
-                    batch_result["successful"].append(result)
-                    batch_result["summary"]["success_count"] += 1
-                    batch_result["summary"]["total_pages"] += result["total_pages"]
-                    
-                    # Count clinical data extractions
-                    if result.get("clinical_data", {}).get("patient_name", {}).get("full_name") or result.get("clinical_data", {}).get("date_of_birth"):
-                        batch_result["summary"]["clinical_data_extracted"] += 1
-                    
-                except Exception as e:
-                    error_info = {
-                        "filename": file_paths[i].name if i < len(file_paths) else "unknown",
-                        "error": str(e),
-                        "error_type": type(e).__name__
-                    }
-                    batch_result["failed"].append(error_info)
+            for file_path, result in zip(file_paths, results):
+                if isinstance(result, Exception):
+                    batch_result["failed"].append(_failure_info(file_path, result))
                     batch_result["summary"]["error_count"] += 1
-                    logger.error(f"Failed to process {file_paths[i]}: {str(e)}")
+                    logger.error(f"Failed to process {file_path}: {str(result)}")
+                    continue
+                
+                batch_result["successful"].append(result)
+                batch_result["summary"]["success_count"] += 1
+                batch_result["summary"]["total_pages"] += result["total_pages"]
+                
+                # Count clinical data extractions
+                if result.get("clinical_data", {}).get("patient_name", {}).get("full_name") or result.get("clinical_data", {}).get("date_of_birth"):
+                    batch_result["summary"]["clinical_data_extracted"] += 1
         
         except Exception as e:
             logger.error(f"Batch processing error: {str(e)}")
@@ -475,37 +801,39 @@ class PDFProcessor:
         matches = []
         query_lower = query.lower()
         
+        query_length = len(query)
+        # A query without cased characters (dates, record numbers) matches the text as-is,
+        # so only fold the pages when case can actually make a difference
+        fold_case = query_lower != query.upper()
+        
         for page in results["pages"]:
-            if "text" in page and query_lower in page["text"].lower():
-                # Find all occurrences in the page
-                text_lower = page["text"].lower()
-                start = 0
-                page_matches = []
-                
-                while True:
-                    pos = text_lower.find(query_lower, start)
-                    if pos == -1:
-                        break
-                    
-                    # Extract context around the match
-                    context_start = max(0, pos - 100)
-                    context_end = min(len(page["text"]), pos + len(query) + 100)
-                    context = page["text"][context_start:context_end]
-                    
-                    page_matches.append({
-                        "position": pos,
-                        "context": context,
-                        "match_text": page["text"][pos:pos + len(query)]
-                    })
-                    
-                    start = pos + 1
-                
-                if page_matches:
-                    matches.append({
-                        "page_number": page["page_number"],
-                        "matches": page_matches,
-                        "match_count": len(page_matches)
-                    })
+            if "text" not in page:
+                continue
+            text = page["text"]
+            
+            # Lowering non-ASCII text can change its length and shift offsets, so the regex
+            # engine matches those pages in place; plain find is faster for everything else
+            if fold_case and not text.isascii():
+                spans = (match.span(1) for match in _search_pattern(query).finditer(text))
+            else:
+                spans = _find_spans(text.lower() if fold_case else text, query_lower, query_length)
+            
+            # Find all occurrences in the page
+            page_matches = []
+            for start, end in spans:
+                # Extract context around the match (slicing clamps at the end of the text)
+                page_matches.append({
+                    "position": start,
+                    "context": text[max(0, start - 100):end + 100],
+                    "match_text": text[start:end]
+                })
+            
+            if page_matches:
+                matches.append({
+                    "page_number": page["page_number"],
+                    "matches": page_matches,
+                    "match_count": len(page_matches)
+                })
         
         return {
             "query": query,
@@ -519,8 +847,9 @@ class PDFProcessor:
         if not results or not results.get("pages"):
             return {"error": "No valid results to summarize"}
         
-        # Calculate statistics
+        # Calculate statistics; builtin sum/max/min reduce these lists in C
         page_lengths = [page.get("text_length", 0) for page in results["pages"]]
+        table_counts = [len(page.get("tables") or ()) for page in results["pages"]]
         
         summary = {
             "filename": results.get("filename", "Unknown"),
@@ -529,8 +858,8 @@ class PDFProcessor:
             "average_page_length": sum(page_lengths) / len(page_lengths) if page_lengths else 0,
             "longest_page": max(page_lengths) if page_lengths else 0,
             "shortest_page": min(page_lengths) if page_lengths else 0,
-            "pages_with_tables": sum(1 for page in results["pages"] if page.get("tables")),
-            "total_tables": sum(len(page.get("tables", [])) for page in results["pages"]),
+            "pages_with_tables": len(table_counts) - table_counts.count(0),
+            "total_tables": sum(table_counts),
             "file_size": results.get("file_size", 0),
             "processed_at": results.get("processed_at"),
             "metadata": results.get("metadata", {})
@@ -538,5 +867,65 @@ class PDFProcessor:
         
         return summary
 
+async def _gather_bounded(coros) -> List[Any]:
+    """Await coroutines with at most MAX_CONCURRENT_TASKS in flight.
+    
+    Results (or raised exceptions) are returned in submission order.
+    """
+    semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_TASKS)
+    
+    async def run(coro):
+        async with semaphore:
+            return await coro
+    
+    return await asyncio.gather(*(run(coro) for coro in coros), return_exceptions=True)
+
+def _failure_info(file_path: Path, error: BaseException) -> Dict[str, Any]:
+    """Describe a file that failed in a batch."""
+    return {
+        "filename": file_path.name,
+        "error": str(error),
+        "error_type": type(error).__name__
+    }
+
+def _merge_page_slices(slices: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine interleaved page slices of one PDF into a single extraction result."""
+    result = slices[0]
+    result["pages"] = sorted(
+        (page for part in slices for page in part["pages"]),
+        key=lambda page: page["page_number"]
+    )
+    result["total_text_length"] = sum(part["total_text_length"] for part in slices)
+    
+    # Each slice tags its own first page with clinical data; only the earliest one counts
+    result["clinical_data"] = {}
+    for page in result["pages"]:
+        if "clinical_data" not in page:
+            continue
+        if result["clinical_data"]:
+            del page["clinical_data"]
+        else:
+            result["clinical_data"] = page["clinical_data"]
+    return result
+
+def _joined_prefix(texts, limit: int) -> str:
+    """Return " ".join(texts)[:limit] without joining more text than the prefix needs."""
+    parts = []
+    joined_length = -1
+    for text in texts:
+        parts.append(text[:limit])
+        joined_length += len(parts[-1]) + 1
+        if joined_length >= limit:
+            break
+    return " ".join(parts)[:limit]
+
 # Global PDF processor instance
 pdf_processor = PDFProcessor()
+
+# Process pool entry points. Bound methods can't be pickled together with the
+# processor's thread pool, so each worker runs these against its own instance.
+def _extract_page_slice(file_path: Path, stride: int, offset: int) -> Dict[str, Any]:
+    return pdf_processor.extract_page_slice(file_path, stride, offset)
+
+def _extract_pages_bytes(data: bytes, filename: str) -> Dict[str, Any]:
+    return pdf_processor.extract_pages_bytes(data, filename)
@@ -14,6 +14,20 @@ sys.path.append(str(Path(__file__).parent.parent))
 from app.core.config import settings
 
 
+async def execute_statements(conn, sql_content: str):
+    """Execute SQL statements one at a time, continuing past failures"""
+    # Split SQL content by statements and execute them
+    statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
+    
+    for statement in statements:
+        try:
+            await conn.execute(statement)
+            print(f"✓ Executed: {statement[:50]}...")
+        except Exception as e:
+            print(f"⚠ Warning executing statement: {e}")
+            # Continue with other statements even if one fails
+
+
 async def init_database():
     """Initialize database tables and default data"""
     try:
@@ -26,20 +40,16 @@ async def init_database():
         init_sql_path = Path(__file__).parent.parent / "init.sql"
         
         if init_sql_path.exists():
-            with open(init_sql_path, 'r') as f:
-                sql_content = f.read()
-            
-            # Split SQL content by statements and execute them
-            statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
+            sql_content = init_sql_path.read_text()
             
-            for statement in statements:
-                if statement:
-                    try:
-                        await conn.execute(statement)
-                        print(f"✓ Executed: {statement[:50]}...")
-                    except Exception as e:
-                        print(f"⚠ Warning executing statement: {e}")
-                        # Continue with other statements even if one fails
+            try:
+                # Run the whole script in one round-trip; either all of it applies or none does
+                async with conn.transaction():
+                    await conn.execute(sql_content)
+                print("✓ Executed init.sql in a single transaction")
+            except asyncpg.PostgresSyntaxError as e:
+                print(f"⚠ init.sql failed as a whole ({e}); executing statements one by one")
+                await execute_statements(conn, sql_content)
             
             print("✅ Database initialization completed successfully")
         else:
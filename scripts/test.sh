@@ -9,9 +9,9 @@ if [ -d "venv" ]; then
     source venv/bin/activate
 fi
 
-# Run tests with pytest
+# Run tests with pytest, spread across all cores (pytest-xdist)
 echo "Running unit tests..."
-pytest tests/ -v --tb=short
+pytest tests/ -v --tb=short -n auto
 
 # Run linting (if flake8 is installed)
 if command -v flake8 &> /dev/null; then
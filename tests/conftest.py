@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from passlib.context import CryptContext
+from app.main import app
+from app.api.v1 import auth
+from app.core import security
+
+# Plaintext passwords of the seeded users
+_SEED_PASSWORDS = {
+    "admin@example.com": "admin123",
+    "user@example.com": "user123"
+}
+
+async def _login(client, email, password):
+    """Log in through the API and return the access token."""
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={
+            "email": email,
+            "password": password
+        }
+    )
+    return response.json()["data"]["access_token"]
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    """Use bcrypt's minimum cost; production's 12 rounds would dominate every login."""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4, deprecated="auto")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(security, "pwd_context", context)
+        mp.setattr(auth, "_DUMMY_HASH", context.hash("invalid"))
+        # A hash is verified at its own cost, so the seeded users need rehashing too
+        for email, password in _SEED_PASSWORDS.items():
+            mp.setattr(auth.MOCK_USERS[email], "hashed_password", context.hash(password))
+        yield
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for the session, so session-scoped async fixtures can share it."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+@pytest_asyncio.fixture(scope="session")
+async def client():
+    """Async client calling the app in-process (one per xdist worker); the app's lifespan runs once."""
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost") as client:
+            yield client
+
+@pytest_asyncio.fixture(scope="session")
+async def admin_token(client):
+    """Access token for the seeded admin user."""
+    return await _login(client, "admin@example.com", "admin123")
+
+@pytest_asyncio.fixture(scope="session")
+async def user_token(client):
+    """Access token for the seeded regular user."""
+    return await _login(client, "user@example.com", "user123")
@@ -1,12 +1,10 @@
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 
-client = TestClient(app)
+pytestmark = pytest.mark.asyncio
 
-def test_register_user():
+async def test_register_user(client):
     """Test user registration."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/auth/register",
         json={
             "email": "test@example.com",
@@ -20,9 +18,9 @@ def test_register_user():
     assert "access_token" in data["data"]
     assert "refresh_token" in data["data"]
 
-def test_login_user():
+async def test_login_user(client):
     """Test user login with existing credentials."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/auth/login",
         json={
             "email": "admin@example.com",
@@ -35,9 +33,9 @@ def test_login_user():
     assert "access_token" in data["data"]
     assert "refresh_token" in data["data"]
 
-def test_login_invalid_credentials():
+async def test_login_invalid_credentials(client):
     """Test login with invalid credentials."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/auth/login",
         json={
             "email": "invalid@example.com",
@@ -46,29 +44,50 @@ def test_login_invalid_credentials():
     )
     assert response.status_code == 401
 
-def test_get_profile_without_token():
+async def test_login_wrong_password(client):
+    """Test login with a known email but the wrong password."""
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={
+            "email": "admin@example.com",
+            "password": "wrongpassword"
+        }
+    )
+    assert response.status_code == 401
+
+async def test_get_profile_without_token(client):
     """Test accessing profile without authentication."""
-    response = client.get("/api/v1/auth/profile")
+    response = await client.get("/api/v1/auth/profile")
     assert response.status_code == 403  # No Authorization header
 
-def test_get_profile_with_token():
+async def test_get_profile_with_token(client, admin_token):
     """Test accessing profile with valid token."""
-    # First login to get token
-    login_response = client.post(
+    response = await client.get(
+        "/api/v1/auth/profile",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["data"]["email"] == "admin@example.com"
+
+async def test_refresh_token(client):
+    """Test exchanging a refresh token for a new access token."""
+    login_response = await client.post(
         "/api/v1/auth/login",
         json={
             "email": "admin@example.com",
             "password": "admin123"
         }
     )
-    token = login_response.json()["data"]["access_token"]
+    refresh_token = login_response.json()["data"]["refresh_token"]
     
-    # Access profile with token
-    response = client.get(
-        "/api/v1/auth/profile",
-        headers={"Authorization": f"Bearer {token}"}
+    response = await client.post(
+        "/api/v1/auth/refresh",
+        json={"refresh_token": refresh_token}
     )
     assert response.status_code == 200
     data = response.json()
     assert data["success"] is True
-    assert data["data"]["email"] == "admin@example.com"
+    assert "access_token" in data["data"]
+    assert data["data"]["refresh_token"] == refresh_token
@@ -1,131 +1,148 @@
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+import errno
 import io
+import os
 from pathlib import Path
+from app.api.v1 import pdf as pdf_api
+from app.core.temp_pool import temp_file_pool
+from app.services.pdf_service import pdf_processor
 
-client = TestClient(app)
+pytestmark = pytest.mark.asyncio
 
-# Helper function to get auth token
-def get_auth_token():
-    """Get authentication token for testing."""
-    response = client.post(
-        "/api/v1/auth/login",
-        json={
-            "email": "admin@example.com",
-            "password": "admin123"
+# More files than BATCH_SIZE of 10
+_OVERSIZED_BATCH = [("files", (f"test{i}.pdf", b"dummy pdf content", "application/pdf")) for i in range(15)]
+
+# Mock PDF processing result
+_PDF_RESULT = {
+    "filename": "test.pdf",
+    "file_size": 1000,
+    "processed_at": "2024-01-01T00:00:00Z",
+    "pages": [
+        {
+            "page_number": 1,
+            "text": "This is a test document with some sample text.",
+            "text_length": 45,
+            "tables": [],
+            "bbox": [0, 0, 100, 100],
+            "width": 100,
+            "height": 100
         }
-    )
-    return response.json()["data"]["access_token"]
+    ],
+    "total_pages": 1,
+    "total_text_length": 45,
+    "metadata": {},
+    "file_hash": "abc123",
+    "status": "success"
+}
 
-def test_pdf_service_health():
+async def test_pdf_service_health(client):
     """Test PDF service health endpoint."""
-    response = client.get("/api/v1/pdf/health")
+    response = await client.get("/api/v1/pdf/health")
     assert response.status_code == 200
     data = response.json()
     assert data["success"] is True
 
-def test_upload_pdf_without_auth():
-    """Test PDF upload without authentication."""
-    # Create a dummy file
-    files = {"file": ("test.pdf", b"dummy pdf content", "application/pdf")}
-    response = client.post("/api/v1/pdf/upload", files=files)
-    assert response.status_code == 403
+@pytest.mark.parametrize("url,files,auth,expected", [
+    # Upload without authentication
+    ("/api/v1/pdf/upload", {"file": ("test.pdf", b"dummy pdf content", "application/pdf")}, False, 403),
+    # Upload with invalid file type
+    ("/api/v1/pdf/upload", {"file": ("test.txt", b"dummy content", "text/plain")}, True, 400),
+    # Batch upload with too many files
+    ("/api/v1/pdf/batch-upload", _OVERSIZED_BATCH, True, 400),
+], ids=["without_auth", "invalid_file_type", "batch_too_many_files"])
+async def test_upload_rejected(client, admin_token, url, files, auth, expected):
+    """Test uploads that are rejected before any processing."""
+    headers = {"Authorization": f"Bearer {admin_token}"} if auth else {}
+    
+    response = await client.post(url, files=files, headers=headers)
+    assert response.status_code == expected
 
-def test_upload_invalid_file_type():
-    """Test upload with invalid file type."""
-    token = get_auth_token()
-    files = {"file": ("test.txt", b"dummy content", "text/plain")}
+async def test_upload_disk_full(client, admin_token, monkeypatch):
+    """Test a spool file that can't be allocated fails the upload up front."""
+    def fallocate(fd, offset, length):
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+    monkeypatch.setattr(os, "posix_fallocate", fallocate)
+    # Spool every upload rather than processing small ones in memory
+    monkeypatch.setattr(pdf_api, "INLINE_PDF_THRESHOLD", 0)
     
-    response = client.post(
+    content = b"%PDF-" + b"0" * 1024
+    response = await client.post(
         "/api/v1/pdf/upload",
-        files=files,
-        headers={"Authorization": f"Bearer {token}"}
+        files={"file": ("test.pdf", content, "application/pdf")},
+        headers={"Authorization": f"Bearer {admin_token}"}
     )
-    assert response.status_code == 400
+    assert response.status_code == 507
 
-def test_batch_upload_too_many_files():
-    """Test batch upload with too many files."""
-    token = get_auth_token()
+async def test_upload_spool_full_falls_back(client, admin_token, monkeypatch, tmp_path):
+    """Test an upload is spooled to disk when the spool filesystem is full."""
+    calls = []
+    def fallocate(fd, offset, length):
+        calls.append(fd)
+        if len(calls) == 1:
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+    monkeypatch.setattr(os, "posix_fallocate", fallocate)
+    monkeypatch.setattr(temp_file_pool, "fallback_dir", str(tmp_path))
+    monkeypatch.setattr(pdf_api, "INLINE_PDF_THRESHOLD", 0)
     
-    # Create more files than allowed
-    files = []
-    for i in range(15):  # Exceeds BATCH_SIZE of 10
-        files.append(("files", (f"test{i}.pdf", b"dummy pdf content", "application/pdf")))
+    spooled = {}
+    async def process(file_path, executor=None):
+        spooled["dir"] = file_path.parent
+        spooled["size"] = file_path.stat().st_size
+        return {"file_size": spooled["size"]}
+    monkeypatch.setattr(pdf_processor, "process_single_pdf_clinical_only", process)
+    
+    content = b"%PDF-" + b"0" * 1024
+    response = await client.post(
+        "/api/v1/pdf/upload",
+        files={"file": ("test.pdf", content, "application/pdf")},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 201
+    assert response.json()["data"]["filename"] == "test.pdf"
+    assert spooled == {"dir": tmp_path, "size": len(content)}
+    # The one-off disk file is removed after processing
+    assert list(tmp_path.iterdir()) == []
+
+async def test_batch_upload_oversized_file(client, admin_token, monkeypatch):
+    """Test a file over MAX_FILE_SIZE is rejected before any spool space is reserved."""
+    calls = []
+    monkeypatch.setattr(os, "posix_fallocate", lambda fd, offset, length: calls.append(length))
+    # A small limit keeps the upload small; the batch's Content-Length cap still lets it through
+    monkeypatch.setattr(pdf_api, "MAX_FILE_SIZE", 1024)
     
-    response = client.post(
+    response = await client.post(
         "/api/v1/pdf/batch-upload",
-        files=files,
-        headers={"Authorization": f"Bearer {token}"}
+        files=[("files", ("large.pdf", b"%PDF-" + b"0" * 1024, "application/pdf"))],
+        headers={"Authorization": f"Bearer {admin_token}"}
     )
-    assert response.status_code == 400
+    assert response.status_code == 413
+    assert calls == []
 
-def test_search_text_in_results():
+async def test_search_text_in_results():
     """Test text search functionality."""
-    token = get_auth_token()
+    # The search endpoint isn't routed, so exercise the service directly
+    results = pdf_processor.search_text_in_results(_PDF_RESULT, "TEST document")
     
-    # Mock PDF processing result
-    pdf_result = {
-        "filename": "test.pdf",
-        "file_size": 1000,
-        "processed_at": "2024-01-01T00:00:00Z",
-        "pages": [
-            {
-                "page_number": 1,
-                "text": "This is a test document with some sample text.",
-                "text_length": 45,
-                "tables": [],
-                "bbox": [0, 0, 100, 100],
-                "width": 100,
-                "height": 100
-            }
-        ],
-        "total_pages": 1,
-        "total_text_length": 45,
-        "metadata": {},
-        "file_hash": "abc123",
-        "status": "success"
-    }
-    
-    search_request = {
-        "query": "test document"
-    }
-    
-    response = client.post(
-        "/api/v1/pdf/search",
-        json=search_request,
-        headers={"Authorization": f"Bearer {token}"},
-        params={"pdf_results": pdf_result}
-    )
-    # This test would need adjustment based on how the search endpoint is implemented
-    # For now, we're just testing the endpoint structure
+    assert results["total_matches"] == 1
+    assert results["pages_with_matches"] == 1
+    match = results["matches"][0]["matches"][0]
+    assert match["position"] == 10
+    assert match["match_text"] == "test document"
 
-def test_get_stats_as_admin():
+async def test_get_stats_as_admin(client, admin_token):
     """Test getting processing stats as admin."""
-    token = get_auth_token()
-    
-    response = client.get(
+    response = await client.get(
         "/api/v1/pdf/stats",
-        headers={"Authorization": f"Bearer {token}"}
+        headers={"Authorization": f"Bearer {admin_token}"}
     )
     assert response.status_code == 200
     data = response.json()
     assert data["success"] is True
 
-def test_get_stats_as_regular_user():
+async def test_get_stats_as_regular_user(client, user_token):
     """Test getting processing stats as regular user (should fail)."""
-    # Login as regular user
-    response = client.post(
-        "/api/v1/auth/login",
-        json={
-            "email": "user@example.com",
-            "password": "user123"
-        }
-    )
-    token = response.json()["data"]["access_token"]
-    
-    response = client.get(
+    response = await client.get(
         "/api/v1/pdf/stats",
-        headers={"Authorization": f"Bearer {token}"}
+        headers={"Authorization": f"Bearer {user_token}"}
     )
     assert response.status_code == 403
@@ -0,0 +1,39 @@
+import pytest
+from app.services.pdf_service import pdf_processor, _merge_page_slices
+
+@pytest.mark.parametrize("text,full_name,date_of_birth,confidence", [
+    # Dotless i is a case variant of "i" for the labels
+    ("Patıent: John Smith\nBırth Date: 01/02/1980", "John Smith", "01/02/1980", "high"),
+    ("PATIENT NAME: Jane Doe\nDOB: 03/04/1975", "Jane Doe", "03/04/1975", "high"),
+    # Dotted capital I lowers to two characters, shifting offsets
+    ("İntake form\nPatient Name: John Smith", "John Smith", None, "medium"),
+    ("Quarterly report with no clinical fields at all.", None, None, "low"),
+], ids=["dotless_i", "upper_case", "dotted_capital_i", "no_labels"])
+def test_extract_clinical_data_labels(text, full_name, date_of_birth, confidence):
+    """Test clinical labels are matched case-insensitively against the original text."""
+    clinical_data = pdf_processor._extract_clinical_data(text)
+    
+    assert clinical_data["patient_name"]["full_name"] == full_name
+    assert clinical_data["date_of_birth"] == date_of_birth
+    assert clinical_data["extraction_confidence"] == confidence
+
+def test_merge_page_slices():
+    """Test interleaved slices merge in page order, keeping the earliest clinical data."""
+    slices = [
+        {"pages": [{"page_number": 1}, {"page_number": 3, "clinical_data": {"page": 3}}], "total_text_length": 10},
+        {"pages": [{"page_number": 2, "clinical_data": {"page": 2}}, {"page_number": 4}], "total_text_length": 5},
+    ]
+    
+    result = _merge_page_slices(slices)
+    
+    assert [page["page_number"] for page in result["pages"]] == [1, 2, 3, 4]
+    assert result["clinical_data"] == {"page": 2}
+    assert "clinical_data" not in result["pages"][2]
+    assert result["total_text_length"] == 15
+
+def test_count_pages_unreadable(tmp_path):
+    """Test a file pdfium can't open counts as no pages."""
+    file_path = tmp_path / "broken.pdf"
+    file_path.write_bytes(b"dummy pdf content")
+    
+    assert pdf_processor.count_pages(file_path) == 0